@@ -0,0 +1,91 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import src.general.config as config
+from PyQt5.QtGui import QGuiApplication
+
+from src.headless import BACKENDS, MODELS, HeadlessRenderer, create_model
+from src.models.models import Cube
+from src.models.state import FaceletBatch
+
+
+def benchmark(model_name: str, n: int, drawer: type, frames: int) -> tuple[float, float]:
+    model = create_model(model_name, n)
+    renderer = HeadlessRenderer(model, drawer=drawer)
+    renderer.release(renderer.render())
+
+    static = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        image = renderer.render()
+        static.append(time.perf_counter() - start)
+        renderer.release(image)
+
+    turning = []
+    side = next(iter(model.cfg.get_sides()))
+    for image, elapsed in renderer.play([(side, 1)], frames + 1):
+        turning.append(elapsed)
+        renderer.release(image)
+
+    return statistics.median(static) * 1000, statistics.median(turning[1:-1]) * 1000
+
+
+def benchmark_states(n: int, count: int, length: int) -> tuple[float, float]:
+    batch = FaceletBatch(Cube(n).state, count)
+    codes = np.random.default_rng(0).integers(0, len(batch.table), size=(length, count))
+
+    start = time.perf_counter()
+    for step in codes:
+        batch.apply_codes(step)
+    random_moves = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for side, direction in batch.template.moves * (length // len(batch.template.moves) + 1):
+        batch.move(side, direction)
+    same_moves = (time.perf_counter() - start) / (length // len(batch.template.moves) + 1)
+
+    return count * length / random_moves, count * len(batch.template.moves) / same_moves
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Compare frame times of the rendering backends')
+    parser.add_argument('-m', '--model', choices=MODELS, default='cube')
+    parser.add_argument('--sizes', type=int, nargs='+', help='cube sizes, 2 to 8 by default; the pyramid is only 3')
+    parser.add_argument('-f', '--frames', type=int, default=10, help='frames per measurement')
+    parser.add_argument('-k', '--states', type=int, help='measure move throughput on this many cube states instead')
+    parser.add_argument('-l', '--length', type=int, default=20, help='scramble length with --states')
+    args = parser.parse_args(argv)
+
+    if MODELS[args.model] == config.PYRAMID:
+        if args.sizes not in (None, [3]):
+            parser.error('The pyramid is only supported with 3 layers')
+        args.sizes = [3]
+    elif args.sizes is None:
+        args.sizes = list(range(2, 9))
+
+    if args.states:
+        print(f'{"n":>3}{"random moves":>22}{"same move":>22}')
+        for n in args.sizes:
+            random_moves, same_moves = benchmark_states(n, args.states, args.length)
+            print(f'{n:>3}{random_moves / 1e6:>15.1f} M/s{same_moves / 1e6:>18.1f} M/s')
+        return
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QGuiApplication(sys.argv[:1])
+
+    print(f'{"n":>3}' + ''.join(f'{name + " static":>18}{name + " turning":>18}' for name in BACKENDS))
+    for n in args.sizes:
+        row = f'{n:>3}'
+        for drawer in BACKENDS.values():
+            static, turning = benchmark(MODELS[args.model], n, drawer, args.frames)
+            row += f'{static:>15.2f} ms{turning:>15.2f} ms'
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
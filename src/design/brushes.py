@@ -0,0 +1,38 @@
+from functools import lru_cache
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QColor
+import src.general.config as config
+
+
+class BrushCache:
+    def __init__(self, colors: dict[str, tuple[int, int, int]], levels: int = config.SHADE_LEVELS):
+        self.colors = colors
+        self.levels = levels
+        self.brushes = {}
+
+    def get_level(self, shadow: float | None) -> int:
+        if shadow is None:
+            return self.levels - 1
+        return round(shadow * (self.levels - 1))
+
+    def get_brush(self, color_side: str, shadow: float | None = None) -> QBrush:
+        key = (color_side, self.get_level(shadow))
+        if key not in self.brushes:
+            k = key[1] / (self.levels - 1)
+            color = (int(color * k) for color in self.colors[color_side])
+            self.brushes[key] = QBrush(QColor(*color), Qt.SolidPattern)
+
+        return self.brushes[key]
+
+
+@lru_cache(maxsize=None)
+def get_brush_cache(model_name: str, levels: int = config.SHADE_LEVELS) -> BrushCache:
+    if model_name == config.CUBE:
+        colors = config.CubeConfig().get_center_colors()
+    elif model_name == config.PYRAMID:
+        colors = config.PyramidConfig().get_center_colors()
+    else:
+        raise ValueError('Invalid model name param')
+
+    return BrushCache(colors, levels)
@@ -1,11 +1,15 @@
-from typing import ValuesView
-
-from PyQt5.QtCore import QPoint
-from PyQt5.QtGui import QPainter, QPolygon
+import numpy as np
+from PyQt5.QtGui import QPainter, QPolygonF
 from src.utils.point import Point
 
 
 class QtDrawer(QPainter):
+    depth_test = False
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.batch = None
+
     def create_line(self, x1: float | int, y1: float | int, x2: float | int, y2: float | int) -> None:
         self.drawLine(int(x1), int(y1), int(x2), int(y2))
 
@@ -18,6 +22,33 @@ class QtDrawer(QPainter):
     def pset_pixel(self, point: Point) -> None:
         self.drawPoint(int(point.x), int(point.y))
 
-    def fill(self, vertices: list[Point] | ValuesView[Point]) -> None:
-        points = QPolygon([QPoint(int(vertex.x), int(vertex.y)) for vertex in vertices])
-        self.drawPolygon(points)
+    def fill(self, vertices: np.ndarray) -> None:
+        if self.batch is None:
+            self.drawPolygon(get_polygon(vertices))
+        else:
+            brush = self.brush()
+            self.batch.setdefault(brush.color().rgba(), (brush, []))[1].append(vertices)
+
+    def begin_batch(self) -> None:
+        self.batch = {}
+
+    def end_batch(self) -> None:
+        batch, self.batch = self.batch, None
+        for brush, polygons in batch.values():
+            buffer = get_polygon(np.concatenate(polygons))
+            self.setBrush(brush)
+
+            # one QPainterPath per brush is slower: Qt strokes it as a whole instead of filling convex polygons
+            start = 0
+            for vertices in polygons:
+                self.drawPolygon(buffer.mid(start, len(vertices)))
+                start += len(vertices)
+
+
+def get_polygon(vertices: np.ndarray) -> QPolygonF:
+    polygon = QPolygonF(len(vertices))
+    data = polygon.data()
+    data.setsize(len(vertices) * 2 * np.dtype(np.float64).itemsize)
+    np.trunc(vertices[:, :2], out=np.frombuffer(data, np.float64).reshape(-1, 2))
+
+    return polygon
@@ -0,0 +1,60 @@
+import numpy as np
+from PyQt5.QtGui import QBrush, QImage, QPen
+
+from src.design.drawer import QtDrawer
+
+
+class RecordingDrawer:
+    depth_test = False
+
+    def __init__(self, width: int, height: int, ratio: float = 1):
+        self.size = (width, height)
+        self.ratio = ratio
+        self.commands = []
+        self.current_pen = QPen()
+        self.current_brush = QBrush()
+
+    def device(self) -> 'RecordingDrawer':
+        return self
+
+    def width(self) -> int:
+        return self.size[0]
+
+    def height(self) -> int:
+        return self.size[1]
+
+    def devicePixelRatioF(self) -> float:
+        return self.ratio
+
+    def setPen(self, pen: QPen) -> None:
+        self.current_pen = QPen(pen)
+        self.commands.append((QtDrawer.setPen, self.current_pen))
+
+    def pen(self) -> QPen:
+        return self.current_pen
+
+    def setBrush(self, brush: QBrush) -> None:
+        self.current_brush = brush
+        self.commands.append((QtDrawer.setBrush, brush))
+
+    def brush(self) -> QBrush:
+        return self.current_brush
+
+    def create_line(self, x1: float | int, y1: float | int, x2: float | int, y2: float | int) -> None:
+        self.commands.append((QtDrawer.create_line, x1, y1, x2, y2))
+
+    def fill(self, vertices: np.ndarray) -> None:
+        self.commands.append((QtDrawer.fill, np.array(vertices)))
+
+    def begin_batch(self) -> None:
+        self.commands.append((QtDrawer.begin_batch,))
+
+    def end_batch(self) -> None:
+        self.commands.append((QtDrawer.end_batch,))
+
+    def drawImage(self, x: int, y: int, image: QImage) -> None:
+        self.commands.append((QtDrawer.drawImage, x, y, image))
+
+    def replay(self, painter: QtDrawer) -> None:
+        for method, *args in self.commands:
+            method(painter, *args)
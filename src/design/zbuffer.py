@@ -0,0 +1,181 @@
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QImage, QPen
+from src.utils.point import Point
+
+LINE_DEPTH_BIAS = 1.0
+
+
+class ZBufferDrawer:
+    depth_test = True
+
+    def __init__(self):
+        self.image = None
+        self.pixels = None
+        self.depth = None
+        self.current_pen = QPen()
+        self.current_brush = QBrush()
+
+    def begin(self, image: QImage) -> bool:
+        if image.format() not in (QImage.Format_RGB32, QImage.Format_ARGB32, QImage.Format_ARGB32_Premultiplied):
+            raise ValueError('Z-buffer drawer works with 32-bit RGB images only')
+
+        bits = image.bits()
+        bits.setsize(image.sizeInBytes())
+        pixels = np.frombuffer(bits, np.uint8).reshape(image.height(), image.bytesPerLine() // 4, 4)
+
+        self.image = image
+        self.pixels = pixels[:, :image.width()]
+        self.depth = np.full((image.height(), image.width()), -np.inf, dtype=np.float32)
+
+        return True
+
+    def end(self) -> bool:
+        self.image = None
+        self.pixels = None
+        self.depth = None
+
+        return True
+
+    def clear(self, background: QImage) -> None:
+        bits = background.constBits()
+        bits.setsize(background.sizeInBytes())
+        pixels = np.frombuffer(bits, np.uint8).reshape(background.height(), background.bytesPerLine() // 4, 4)
+
+        self.pixels[...] = pixels[:self.pixels.shape[0], :self.pixels.shape[1]]
+        self.depth.fill(-np.inf)
+
+    def isActive(self) -> bool:
+        return self.image is not None
+
+    def device(self) -> QImage:
+        return self.image
+
+    def setPen(self, pen: QPen) -> None:
+        self.current_pen = QPen(pen)
+
+    def pen(self) -> QPen:
+        return self.current_pen
+
+    def setBrush(self, brush: QBrush) -> None:
+        self.current_brush = QBrush(brush)
+
+    def brush(self) -> QBrush:
+        return self.current_brush
+
+    def begin_batch(self) -> None:
+        pass
+
+    def end_batch(self) -> None:
+        pass
+
+    def create_line(self, x1: float | int, y1: float | int, x2: float | int, y2: float | int) -> None:
+        self.draw_line(np.array([[x1, y1], [x2, y2]], dtype=float), None)
+
+    def pcreate_line(self, point_1: Point, point_2: Point) -> None:
+        self.create_line(point_1.x, point_1.y, point_2.x, point_2.y)
+
+    def set_pixel(self, x: float | int, y: float | int) -> None:
+        x, y = int(x), int(y)
+        if 0 <= y < self.pixels.shape[0] and 0 <= x < self.pixels.shape[1]:
+            self.pixels[y, x] = get_bgra(self.current_pen.color())
+
+    def pset_pixel(self, point: Point) -> None:
+        self.set_pixel(point.x, point.y)
+
+    def fill(self, vertices: np.ndarray) -> None:
+        if len(vertices) > 1 and np.array_equal(vertices[0], vertices[-1]):
+            vertices = vertices[:-1]
+
+        plane = get_depth_plane(vertices)
+        brush = None
+        if self.current_brush.style() != Qt.NoBrush and plane is not None:
+            brush = get_bgra(self.current_brush.color())
+        pen = None
+        if self.current_pen.style() != Qt.NoPen:
+            pen = get_bgra(self.current_pen.color())
+            if plane is None:
+                plane = np.array([0, 0, vertices[:, 2].max()])
+
+        if brush is not None or pen is not None:
+            self.fill_polygon(vertices[:, :2], plane, brush, pen)
+
+    def draw_line(self, points: np.ndarray, plane: np.ndarray | None) -> None:
+        direction = points[1] - points[0]
+        length = np.hypot(*direction)
+        if length == 0:
+            return
+
+        half_width = max(self.current_pen.widthF(), 1) / 2
+        direction *= half_width / length
+        normal = np.array([-direction[1], direction[0]])
+
+        start, finish = points[0] - direction, points[1] + direction
+        quad = np.array([start + normal, finish + normal, finish - normal, start - normal])
+        if plane is None:
+            plane = np.array([0, 0, np.inf])
+
+        self.fill_polygon(quad, plane, get_bgra(self.current_pen.color()), None)
+
+    def fill_polygon(self, points: np.ndarray, plane: np.ndarray,
+                     brush: np.ndarray | None, pen: np.ndarray | None) -> None:
+        half_width = max(self.current_pen.widthF(), 1) / 2 if pen is not None else 0
+        height, width = self.depth.shape
+        x0, y0 = np.maximum(np.floor(points.min(axis=0) - half_width).astype(int), 0)
+        x1, y1 = np.minimum(np.ceil(points.max(axis=0) + half_width).astype(int), (width - 1, height - 1))
+        if x0 > x1 or y0 > y1:
+            return
+
+        xs = np.arange(x0, x1 + 1, dtype=np.float32) + 0.5
+        ys = np.arange(y0, y1 + 1, dtype=np.float32)[:, np.newaxis] + 0.5
+
+        starts = points
+        edges = np.roll(points, -1, axis=0) - points
+        if get_signed_area(points) < 0:
+            edges = -edges
+            starts = np.roll(points, -1, axis=0)
+        lengths = np.hypot(edges[:, 0], edges[:, 1])
+        starts, edges = starts[lengths > 0], edges[lengths > 0] / lengths[lengths > 0, np.newaxis]
+        starts, edges, plane = starts.astype(np.float32), edges.astype(np.float32), plane.astype(np.float32)
+
+        distance = np.full((len(ys), len(xs)), -np.inf, dtype=np.float32)
+        for (sx, sy), (ex, ey) in zip(starts, edges):
+            np.maximum(distance, (xs - sx) * ey - (ys - sy) * ex, out=distance)
+
+        depth = self.depth[y0:y1 + 1, x0:x1 + 1]
+        pixels = self.pixels[y0:y1 + 1, x0:x1 + 1]
+        z = np.broadcast_to(plane[0] * xs + plane[1] * ys + plane[2], distance.shape)
+
+        if brush is not None:
+            mask = (distance <= -half_width) & (z >= depth)
+            depth[mask] = z[mask]
+            pixels[mask] = brush
+        if pen is not None:
+            z = z + LINE_DEPTH_BIAS
+            mask = (distance <= half_width) & (distance > -half_width) & (z >= depth)
+            depth[mask] = z[mask]
+            pixels[mask] = pen
+
+
+def get_bgra(color) -> np.ndarray:
+    return np.array([color.blue(), color.green(), color.red(), 255], dtype=np.uint8)
+
+
+def get_signed_area(points: np.ndarray) -> float:
+    x, y = points[:, 0], points[:, 1]
+    return (x * np.roll(y, -1) - np.roll(x, -1) * y).sum() / 2
+
+
+def get_depth_plane(vertices: np.ndarray) -> np.ndarray | None:
+    if len(vertices) < 3:
+        return None
+
+    centered = vertices - vertices.mean(axis=0)
+    normal = np.linalg.svd(centered)[2][-1]
+    if abs(normal[2]) < 1e-9:
+        return None
+
+    a, b = -normal[0] / normal[2], -normal[1] / normal[2]
+    c = vertices[:, 2].mean() - a * vertices[:, 0].mean() - b * vertices[:, 1].mean()
+
+    return np.array([a, b, c])
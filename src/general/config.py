@@ -1,13 +1,18 @@
+from functools import lru_cache
 from math import sqrt, tan, degrees, radians, acos
+from typing import Iterable
 from src.utils.edge import Edge
 from src.general.errors import SideNameError
 from src.utils.point import Point
 
 EPS = 1e5
 SHADOW = 0.15
+SHADE_LEVELS = 256
+MERGE_STICKERS_SIZE = 6
 CUBE = 'Кубик Рубика'
 PYRAMID = 'Пирамидка'
 MEGAMINX = 'Мегаминкс'
+SIDE_BITS = {side: 1 << i for i, side in enumerate('UDRLFB')}
 
 
 class Config:
@@ -30,6 +35,36 @@ class Config:
         self.right_light = Point(self.dx + 1000, self.dy, self.dz + 1000)
         self.left_light = Point(self.dx - 1000, self.dy, self.dz + 1000)
 
+        self.turn_duration = 300
+        self.frame_interval = 16
+
+
+def get_canonical_key(key: str | list[str]) -> str:
+    return ''.join(sorted(key))
+
+
+def get_mask(sides: Iterable[str]) -> int:
+    return sum(SIDE_BITS[side] for side in set(sides))
+
+
+@lru_cache(maxsize=None)
+def get_exchanges(model_name: str) -> dict[str, dict[str, tuple[str, ...]]]:
+    if model_name == CUBE:
+        cfg = CubeConfig()
+    elif model_name == PYRAMID:
+        cfg = PyramidConfig()
+    else:
+        raise ValueError('Invalid model name param')
+
+    exchanges = {
+        'corners': cfg.get_exchanges_corners(),
+        'ribs': cfg.get_exchanges_ribs(),
+        'centers': cfg.get_exchanges_centers()
+    }
+
+    return {kind: {side: tuple(get_canonical_key(key) for key in cycle) for side, cycle in cycles.items()}
+            for kind, cycles in exchanges.items()}
+
 
 def get_colors(mode='standard'):
     match mode:
@@ -362,6 +397,9 @@ class CubeConfig:
 
         return sides
 
+    def get_turn_angle(self) -> int:
+        return 90
+
     def get_opposite(self, side: str) -> str:
         sides = {
             'U': 'D',
@@ -667,6 +705,9 @@ class PyramidConfig:
 
         return sides
 
+    def get_turn_angle(self) -> int:
+        return 120
+
     def get_opposite(self, side: str) -> str:
         sides = {
             'F': 'F',
@@ -1,11 +1,15 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
 import PyQt5.QtGui
-from PyQt5.QtCore import QRect, QPoint
-from PyQt5.QtGui import QColor, QRadialGradient, QBrush
+from PyQt5.QtCore import QRect, QPoint, QSize
+from PyQt5.QtGui import QColor, QRadialGradient, QBrush, QPainter, QPixmap
 from PyQt5 import QtWidgets, QtCore
 
 from src.general.config import Config, get_colors, CUBE, PYRAMID
 from src.design.design import Ui_MainWindow
 from src.design.drawer import QtDrawer
+from src.design.recorder import RecordingDrawer
 from src.models.models import Cube, Pyramid
 from src.utils.mymath import sign
 from src.utils.point import Point
@@ -25,17 +29,20 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.gradient = QRadialGradient(QPoint(int(Config().dx), int(Config().dy)), 600)
         self.gradient.setColorAt(0, QColor('lightgrey'))
         self.gradient.setColorAt(1, QColor('grey'))
+        self.background = None
 
         self.model = None
+        self.model_bounds = QRect()
+        self.pending_bounds = QRect()
         self.k_step = 80
         self.k = self.k_step
         self.angle = 10
         self.speed = 2
         self.angle_to_turn = 90
 
-        self.models.setCurrentText(CUBE)
-        self.sizeModel.setCurrentText('3x3x3')
-        self.load_model()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='geometry')
+        self.frame: RecordingDrawer | None = None
+        self.next_frame: Future | None = None
 
         self.x = 0
         self.y = 0
@@ -43,12 +50,19 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.viewer = Point(self.cfg.dx, self.cfg.dy, self.cfg.dz)
 
         self.timer = QtCore.QTimer()
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
         self.timer.timeout.connect(self.turn_side)
-        self.duration = 0
-        self.turning_side = ''
+        self.turn_clock = QtCore.QElapsedTimer()
+        self.turn_duration = self.cfg.turn_duration
+        self.turning_angle = 0
+        self.turning_side = None
         self.turning_direction = 0
         self.plastic_vertices = None
 
+        self.models.setCurrentText(CUBE)
+        self.sizeModel.setCurrentText('3x3x3')
+        self.load_model()
+
         self.loadButton.clicked.connect(self.load_model)
         self.scaleSlider.valueChanged.connect(self.scale_model)
         self.models.currentTextChanged.connect(self.load_model)
@@ -116,6 +130,7 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.back_.setStyleSheet(f'border : 2px solid black;\nborder-radius : 8px;\nbackground-color : {colors["B"]}')
 
     def load_model(self) -> None:
+        self.stop_turning()
         self.scaleSlider.setValue(self.k_step)
         self.k = self.k_step
         model = self.models.currentText()
@@ -125,54 +140,54 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         if model == CUBE:
             size = int(self.sizeModel.currentText().split('x')[0])
             self.model = Cube(size)
-            self.angle_to_turn = 90
+            self.angle_to_turn = self.model.cfg.get_turn_angle()
 
             self.model.turn_oy(45)
             self.model.turn_ox(-30)
 
-            self.update()
+            self.update_model()
 
         elif model == PYRAMID:
             self.sizeModel.setCurrentText('3x3x3')
             size = int(self.sizeModel.currentText().split('x')[0])
             self.model = Pyramid(size)
 
-            self.angle_to_turn = 120
+            self.angle_to_turn = self.model.cfg.get_turn_angle()
 
             self.model.turn_oy(60)
             self.model.turn_ox(-30)
 
-            self.update()
+            self.update_model()
 
     def paintEvent(self, event: PyQt5.QtGui.QPaintEvent) -> None:
         painter = QtDrawer()
         painter.begin(self)
 
-        brush = QBrush(self.gradient)
-        painter.setBrush(brush)
-        painter.drawRect(self.image)
+        painter.drawPixmap(self.image.topLeft(), self.get_background())
 
-        if self.duration == 0:
+        if self.frame is None:
             self.model.draw(painter)
         else:
-            self.model.draw_turning(painter, self.turning_side, self.plastic_vertices)
+            self.frame.replay(painter)
 
         painter.end()
 
     def scale_model(self) -> None:
         if not self.model or self.k == self.scaleSlider.value():
             return
+        self.wait_frame()
 
         self.k = self.scaleSlider.value()
         if self.k < 1:
             self.k = 1
 
         self.model.scale(self.k / self.k_step)
-        self.update()
+        self.update_model()
 
     def wheelEvent(self, event: PyQt5.QtGui.QWheelEvent) -> None:
         if not self.model:
             return
+        self.wait_frame()
 
         self.k += event.angleDelta().y() / 120
         if self.k < 1:
@@ -182,26 +197,29 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         self.scaleSlider.setValue(int(self.k))
         self.model.scale(self.k / self.k_step)
-        self.update()
+        self.update_model()
 
     def turn_model_ox(self, angle: int) -> None:
+        self.wait_frame()
         self.model.turn_ox(angle)
-        self.update()
+        self.update_model()
 
     def turn_model_oy(self, angle: int) -> None:
+        self.wait_frame()
         self.model.turn_oy(angle)
-        self.update()
+        self.update_model()
 
     def turn_model_oz(self, angle: int) -> None:
+        self.wait_frame()
         self.model.turn_oz(angle)
-        self.update()
+        self.update_model()
 
     def mousePressEvent(self, event: PyQt5.QtGui.QMouseEvent) -> None:
         if self.x != event.x() or self.y != event.y():
             self.x, self.y = event.x(), event.y()
 
     def mouseMoveEvent(self, event: PyQt5.QtGui.QMouseEvent) -> None:
-        if self.duration != 0:
+        if self.timer.isActive():
             return
 
         x1, y1 = event.x(), event.y()
@@ -227,42 +245,136 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         if isinstance(self.model, Pyramid) and (name == 'B' or name == 'U'):
             return
 
-        if self.duration == 0:
+        if not self.timer.isActive():
             self.plastic_vertices = self.model.get_static_plastic_part(name)
             self.set_turning_params(name, direction)
             if isinstance(self.model, Pyramid):
                 self.model.init_turning_centers(name)
-            self.timer.start(0)
+            self.frame = self.record_frame(self.model.draw, self.get_frame_size())
+            self.pending_bounds = self.model_bounds
+            self.turn_clock.start()
+            self.timer.start(self.cfg.frame_interval)
 
     def turn_side(self) -> None:
-        self.duration += 1
-        self.model.turn_side(self.turning_side, self.turning_direction)
+        if self.next_frame is not None:
+            if not self.next_frame.done():
+                return
+
+            self.frame, finished, bounds = self.next_frame.result()
+            self.next_frame = None
+            if finished:
+                self.timer.stop()
+                self.turning_angle = 0
+                self.frame = None
+                self.update(self.pending_bounds.united(self.model_bounds).united(bounds))
+                self.pending_bounds = QRect()
+                self.model_bounds = bounds
+                return
+
+            self.update(self.pending_bounds.united(bounds))
+            self.pending_bounds = bounds
+
+        elapsed = self.turn_clock.elapsed() + self.cfg.frame_interval
+        progress = min(elapsed / self.turn_duration, 1)
+        angle = round(self.angle_to_turn * progress)
+        if angle == self.turning_angle and progress < 1:
+            return
 
-        if self.duration >= self.angle_to_turn:
-            self.update_sides()
-            if isinstance(self.model, Pyramid):
-                self.model.uninit_turning_centers()
-            self.timer.stop()
-            self.duration = 0
+        self.turning_angle = angle
+        self.next_frame = self.executor.submit(self.prepare_frame, angle, progress == 1, self.get_frame_size())
+
+    def prepare_frame(self, angle: int, finished: bool,
+                      size: tuple[int, int, float]) -> tuple[RecordingDrawer, bool, QRect]:
+        self.model.set_turning_angle(self.turning_side, self.turning_direction * angle)
+
+        if not finished:
+            frame = self.record_frame(
+                lambda painter: self.model.draw_turning(painter, self.turning_side, self.plastic_vertices), size
+            )
+            return frame, False, self.model.get_bounds(self.model.turning_indices)
+
+        self.update_sides()
+        if isinstance(self.model, Pyramid):
+            self.model.uninit_turning_centers()
+
+        return self.record_frame(self.model.draw, size), True, self.model.get_bounds()
+
+    @staticmethod
+    def record_frame(draw: Callable[[RecordingDrawer], None], size: tuple[int, int, float]) -> RecordingDrawer:
+        frame = RecordingDrawer(*size)
+        draw(frame)
+
+        return frame
+
+    def get_frame_size(self) -> tuple[int, int, float]:
+        return self.width(), self.height(), self.devicePixelRatioF()
+
+    def get_background(self) -> QPixmap:
+        ratio = self.devicePixelRatioF()
+        if self.background is None or self.background.devicePixelRatioF() != ratio:
+            size = self.image.size() + QSize(1, 1)
+            self.background = QPixmap(size * ratio)
+            self.background.setDevicePixelRatio(ratio)
+
+            painter = QPainter(self.background)
+            painter.translate(-self.image.topLeft())
+            painter.setBrush(QBrush(self.gradient))
+            painter.drawRect(self.image)
+            painter.end()
+
+        return self.background
+
+    def update_model(self) -> None:
+        bounds = self.model.get_bounds()
+        changed = self.model_bounds.united(bounds)
+        self.model_bounds = bounds
+
+        self.update(changed)
+        if self.timer.isActive():
+            self.pending_bounds = self.pending_bounds.united(changed)
+
+    def wait_frame(self) -> None:
+        if self.next_frame is not None:
+            self.next_frame.result()
+
+    def stop_turning(self) -> None:
+        self.timer.stop()
+        self.wait_frame()
+        self.next_frame = None
+        self.frame = None
+
+        if isinstance(self.model, Pyramid) and self.turning_side is not None:
+            self.model.uninit_turning_centers()
+        self.turning_angle = 0
+        self.turning_side = None
+        self.turning_direction = 0
 
-        self.update()
+        self.update(self.pending_bounds)
+        self.pending_bounds = QRect()
 
     def update_sides(self) -> None:
         self.model.update_sides(self.turning_side, self.turning_direction)
 
+    def closeEvent(self, event: PyQt5.QtGui.QCloseEvent) -> None:
+        self.timer.stop()
+        self.executor.shutdown()
+        super().closeEvent(event)
+
     def keyPressEvent(self, event: PyQt5.QtGui.QKeyEvent) -> None:
         key = PyQt5.QtCore.Qt.Key(event.key())
 
-        if key in self.turning_keys and self.duration == 0:
+        if key in self.turning_keys and not self.timer.isActive():
             self.start_turning_side(*self.turning_keys[key])
 
     def add_light_source(self, point: Point) -> None:
+        self.wait_frame()
         self.model.add_light(point)
-        self.update()
+        self.update_model()
 
     def delete_light_source(self, point: Point) -> None:
+        self.wait_frame()
         self.model.del_light(point)
-        self.update()
+        self.update_model()
 
     def change_right_light(self) -> None:
         if self.right_light.isChecked():
@@ -0,0 +1,286 @@
+import argparse
+import os
+import queue
+import re
+import statistics
+import sys
+import threading
+import time
+from typing import BinaryIO, Callable, Iterator
+
+import src.general.config as config
+from PyQt5.QtCore import QPoint
+from PyQt5.QtGui import QGuiApplication, QImage, QColor, QPainter, QRadialGradient, QBrush
+
+from src.design.drawer import QtDrawer
+from src.design.zbuffer import ZBufferDrawer
+from src.models.models import Model, Cube, Pyramid
+
+MOVE_PATTERN = re.compile(r"(\d*[A-Z]w?)(2?)('?)")
+MODELS = {'cube': config.CUBE, 'pyramid': config.PYRAMID}
+BACKENDS = {'qt': QtDrawer, 'zbuffer': ZBufferDrawer}
+
+
+def parse_moves(moves: str) -> list[tuple[str, int]]:
+    result = []
+    for token in moves.split():
+        match = MOVE_PATTERN.fullmatch(token)
+        if not match:
+            raise ValueError(f'Incorrect move "{token}"')
+
+        name, twice, prime = match.groups()
+        result += [(name, -1 if prime else 1)] * (2 if twice else 1)
+
+    return result
+
+
+def create_model(model_name: str, n: int) -> Model:
+    if model_name == config.CUBE:
+        model = Cube(n)
+        model.turn_oy(45)
+        model.turn_ox(-30)
+    elif model_name == config.PYRAMID:
+        model = Pyramid(n)
+        model.turn_oy(60)
+        model.turn_ox(-30)
+    else:
+        raise ValueError('Invalid model name param')
+
+    return model
+
+
+class HeadlessRenderer:
+    def __init__(self, model: Model, width: int = config.Config().main_width,
+                 height: int = config.Config().main_height, drawer: type = QtDrawer):
+        self.model = model
+        self.width = width
+        self.height = height
+        self.drawer = drawer
+
+        cfg = config.Config()
+        gradient = QRadialGradient(QPoint(int(cfg.dx), int(cfg.dy)), 600)
+        gradient.setColorAt(0, QColor('lightgrey'))
+        gradient.setColorAt(1, QColor('grey'))
+
+        self.background = QImage(width, height, QImage.Format_RGB32)
+        painter = QPainter(self.background)
+        painter.fillRect(self.background.rect(), QBrush(gradient))
+        painter.end()
+
+        self.free_frames = queue.SimpleQueue()
+
+    def get_frame(self) -> QImage:
+        try:
+            return self.free_frames.get_nowait()
+        except queue.Empty:
+            return QImage(self.width, self.height, QImage.Format_RGB32)
+
+    def release(self, image: QImage) -> None:
+        self.free_frames.put(image)
+
+    def render(self, side: str | None = None, plastic_part=None) -> QImage:
+        image = self.get_frame()
+
+        painter = self.drawer()
+        painter.begin(image)
+        if painter.depth_test:
+            painter.clear(self.background)
+        else:
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            painter.drawImage(0, 0, self.background)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        if side is None:
+            self.model.draw(painter)
+        else:
+            self.model.draw_turning(painter, side, plastic_part)
+        painter.end()
+
+        return image
+
+    def check_move(self, name: str) -> None:
+        sides = self.model.cfg.get_sides()
+        try:
+            self.model.get_turn(name)
+        except ValueError as e:
+            raise ValueError(f'{e}, use one of {", ".join(sides)}') from None
+
+    def get_frames_per_turn(self, step: int) -> int:
+        angle = self.model.cfg.get_turn_angle()
+        if step < 1 or angle % step:
+            raise ValueError(f'Step should divide the turn angle {angle}')
+
+        return angle // step
+
+    def play(self, moves: list[tuple[str, int]], frames_per_turn: int) -> Iterator[tuple[QImage, float]]:
+        if frames_per_turn < 1:
+            raise ValueError('There should be at least one frame per turn')
+        for side, _ in moves:
+            self.check_move(side)
+
+        angle = self.model.cfg.get_turn_angle()
+
+        start = time.perf_counter()
+        yield self.render(), time.perf_counter() - start
+
+        for side, direction in moves:
+            start = time.perf_counter()
+            plastic_part = self.model.get_static_plastic_part(side)
+            if isinstance(self.model, Pyramid):
+                self.model.init_turning_centers(side)
+
+            for frame in range(1, frames_per_turn + 1):
+                self.model.set_turning_angle(side, direction * angle * frame / frames_per_turn)
+                if frame < frames_per_turn:
+                    image = self.render(side, plastic_part)
+                else:
+                    self.model.update_sides(side, direction)
+                    if isinstance(self.model, Pyramid):
+                        self.model.uninit_turning_centers()
+                    image = self.render()
+
+                yield image, time.perf_counter() - start
+                start = time.perf_counter()
+
+
+def get_rgba(image: QImage) -> bytes:
+    image_format = image.format()
+    image.convertTo(QImage.Format_RGBA8888)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rgba = bits.asstring()
+    image.convertTo(image_format)
+
+    return rgba
+
+
+def write_frames(frames: Iterator[tuple[QImage, float]], output: str, output_format: str,
+                 queue_size: int = 8, workers: int | None = None,
+                 release: Callable[[QImage], None] | None = None) -> list[float]:
+    timings = []
+    errors = []
+    frames_queue = queue.Queue(maxsize=queue_size)
+    stream: BinaryIO | None = None
+
+    if output_format == 'rgba':
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        workers = 1
+    else:
+        os.makedirs(output, exist_ok=True)
+        workers = workers or os.cpu_count() or 1
+
+    def write_frame(i: int, image: QImage) -> None:
+        if stream is not None:
+            stream.write(get_rgba(image))
+        elif not image.save(os.path.join(output, f'frame_{i:05d}.png')):
+            raise OSError(f'Could not write frame {i} to {output}')
+
+    def consume() -> None:
+        while (item := frames_queue.get()) is not None:
+            try:
+                if not errors:
+                    write_frame(*item)
+            except OSError as e:
+                errors.append(e)
+            finally:
+                if release is not None:
+                    release(item[1])
+
+    consumers = [threading.Thread(target=consume, daemon=True) for _ in range(workers)]
+    for consumer in consumers:
+        consumer.start()
+
+    try:
+        for i, (image, elapsed) in enumerate(frames):
+            if errors:
+                break
+            timings.append(elapsed)
+            frames_queue.put((i, image))
+    finally:
+        for _ in consumers:
+            frames_queue.put(None)
+        for consumer in consumers:
+            consumer.join()
+        if stream is not None:
+            stream.flush()
+            if stream is not sys.stdout.buffer:
+                stream.close()
+
+    if errors:
+        raise errors[0]
+
+    return timings
+
+
+def report_timings(timings: list[float], file=sys.stderr) -> None:
+    ms = sorted(timing * 1000 for timing in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f'frames: {len(ms)}, total: {sum(ms):.1f} ms, mean: {statistics.mean(ms):.2f} ms, '
+          f'median: {statistics.median(ms):.2f} ms, p95: {p95:.2f} ms, max: {ms[-1]:.2f} ms', file=file)
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Render a puzzle and a move sequence without a window')
+    parser.add_argument('-m', '--model', choices=MODELS, default='cube')
+    parser.add_argument('-n', '--size', type=int, default=3, help='number of layers')
+    parser.add_argument('moves', nargs='?', default='', help='move sequence, for example "R U\' F2 2R 3Uw"')
+    parser.add_argument('-s', '--step', type=int, default=1, help='degrees of a layer turn per frame')
+    parser.add_argument('--fps', type=float, help='export at a fixed frame rate instead of a fixed step')
+    parser.add_argument('--turn-time', type=float, default=0.5, help='seconds per layer turn with --fps')
+    parser.add_argument('-q', '--queue', type=int, default=8, help='frames waiting for encoding at most')
+    parser.add_argument('-j', '--jobs', type=int, help='PNG encoding threads, all CPUs by default')
+    parser.add_argument('-b', '--backend', choices=BACKENDS, default='qt',
+                        help='rasterizer: QPainter or the NumPy z-buffer')
+    parser.add_argument('-l', '--light', action='append', choices=('left', 'right'), default=[])
+    parser.add_argument('-k', '--scale', type=float, default=1)
+    parser.add_argument('-f', '--format', choices=('png', 'rgba'), default='png')
+    parser.add_argument('-o', '--output', default='frames', help='PNG directory, RGBA file or - for stdout')
+    parser.add_argument('--width', type=int, default=config.Config().main_width)
+    parser.add_argument('--height', type=int, default=config.Config().main_height)
+    parser.add_argument('-t', '--timings', help='file to write per-frame timings in milliseconds')
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QGuiApplication(sys.argv[:1])
+
+    try:
+        moves = parse_moves(args.moves)
+        model = create_model(MODELS[args.model], args.size)
+    except (ValueError, KeyError) as e:
+        parser.error(str(e))
+
+    model.scale(args.scale)
+    cfg = config.Config()
+    for light in args.light:
+        model.add_light(cfg.left_light if light == 'left' else cfg.right_light)
+
+    renderer = HeadlessRenderer(model, args.width, args.height, BACKENDS[args.backend])
+    start = time.perf_counter()
+    try:
+        if args.fps:
+            frames_per_turn = max(1, round(args.fps * args.turn_time))
+        else:
+            frames_per_turn = renderer.get_frames_per_turn(args.step)
+        frames = renderer.play(moves, frames_per_turn)
+        timings = write_frames(frames, args.output, args.format, max(1, args.queue), args.jobs, renderer.release)
+    except ValueError as e:
+        parser.error(str(e))
+    wall_time = time.perf_counter() - start
+
+    if args.timings:
+        with open(args.timings, 'w') as f:
+            f.writelines(f'{timing * 1000:.3f}\n' for timing in timings)
+    report_timings(timings)
+    if args.fps:
+        duration = len(timings) / args.fps
+        print(f'exported {duration:.2f} s of animation in {wall_time:.2f} s '
+              f'({duration / wall_time:.1f}x real time)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
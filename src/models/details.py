@@ -1,19 +1,43 @@
+from functools import lru_cache
+
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor, QBrush, QPen
+from PyQt5.QtGui import QPen
+import numpy as np
 import src.general.config as config
-from copy import deepcopy, copy
 
+from src.design.brushes import get_brush_cache
 from src.design.drawer import QtDrawer
+from src.utils.buffer import VertexBuffer
 from src.utils.edge import Edge
-from src.utils.point import divide_line_by_num
-from src.utils.matrix import MatrixPlane
-from src.utils.mymath import find_by_key, get_vertices_by_pairs, replace_list, reverse_replace_list, get_plane_cosine
-from src.utils.mymath import Vector
+from src.utils.mymath import get_vertices_by_pairs
+from src.utils.mymath import get_plane_normals, get_planes_shadows
 from src.utils.point import Point
 
 
+@lru_cache(maxsize=None)
+def get_sticker_loops(model_name: str) -> dict[tuple[str, ...], np.ndarray]:
+    if model_name == config.CUBE:
+        cfg = config.CubeConfig()
+    elif model_name == config.PYRAMID:
+        cfg = config.PyramidConfig()
+    else:
+        raise ValueError('Invalid model name param')
+
+    vertices, edges = cfg.get_eccentric_data()
+    keys = {key: i for i, key in enumerate(vertices)}
+
+    loops = {}
+    for side_edges in cfg.get_eccentric_detail_sides().values():
+        vertices_pairs = [list(edges[key].get_points(keys)) for key in side_edges]
+        loop = np.array(get_vertices_by_pairs(vertices_pairs))
+        loop.flags.writeable = False
+        loops[side_edges] = loop
+
+    return loops
+
+
 class Detail:
-    def __init__(self, vertices: dict[str, Point], edges: dict[str, Edge] | list[Edge],
+    def __init__(self, buffer: VertexBuffer, vertices: dict[str, Point], edges: dict[str, Edge] | list[Edge],
                  offset: Point, name: str, model_name: str, eccentric: bool = True):
         if model_name == config.CUBE:
             self.cfg = config.CubeConfig()
@@ -23,18 +47,26 @@ class Detail:
             raise ValueError('Invalid model name param')
         self.model_name = model_name
 
-        self.vertices = vertices
+        self.buffer = buffer
+        self.keys = {key: i for i, key in enumerate(vertices)}
+        self.indices = buffer.add(vertices.values())
         self.edges = edges
         self.name = None
-        self.prev_name = None
+        self.mask = 0
         self.set_name(name)
-        self.name_for_color = list(name)
-        self.colors = self.cfg.get_center_colors()
+        self.state = None
+        self.facelets = None
+        self.colors = None
+        self.colors_version = None
+        self.brushes = get_brush_cache(model_name)
         if eccentric:
             self.sides = self.cfg.get_eccentric_detail_sides()
+            self.loops = get_sticker_loops(model_name)
+
+        self.shadows = {}
+        self.shadows_version = None
 
         self.move(offset)
-        self.move(config.Config().center)
 
     def __str__(self):
         result = 'Detail\n[\n'
@@ -43,44 +75,23 @@ class Detail:
         result += ']\n'
         return result
 
-    def turn_ox(self, angle: float) -> None:
-        for vertex in self.vertices.values():
-            vertex.turn_ox(angle)
-
-    def turn_oy(self, angle: float) -> None:
-        for vertex in self.vertices.values():
-            vertex.turn_oy(angle)
+    @property
+    def vertices(self) -> np.ndarray:
+        return self.buffer.points[self.indices]
 
-    def turn_oz(self, angle: float) -> None:
-        for vertex in self.vertices.values():
-            vertex.turn_oz(angle)
+    @property
+    def rest_vertices(self) -> np.ndarray:
+        return self.buffer.rest[self.indices]
 
     def move(self, offset: Point) -> None:
-        for vertex in self.vertices.values():
-            vertex.move(offset)
-
-    def scale(self, k: float, point: Point) -> None:
-        for vertex in self.vertices.values():
-            vertex.scale(k, point)
-
-    def turn_ox_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for vertex in self.vertices.values():
-            vertex.turn_ox_funcs(sin_angle, cos_angle)
-
-    def turn_oy_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for vertex in self.vertices.values():
-            vertex.turn_oy_funcs(sin_angle, cos_angle)
-
-    def turn_oz_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for vertex in self.vertices.values():
-            vertex.turn_oz_funcs(sin_angle, cos_angle)
+        self.buffer.move(offset, self.indices)
 
     def set_name(self, name: str) -> None:
-        self.prev_name = self.name
         self.name = list(name)
+        self.mask = config.get_mask(name)
 
-    def update_sides(self, side: str, direction: int) -> None:
-        exchange = self.cfg.get_exchanges_centers()[side]
+    def turn_sides(self, side: str, direction: int) -> None:
+        exchange = config.get_exchanges(self.model_name)['centers'][side]
 
         dir_range = range(len(exchange) - 2, -1, -1) if direction > 0 else range(1, len(exchange))
         saved_ind = -1 if direction > 0 else 0
@@ -92,38 +103,57 @@ class Detail:
             self.sides[i_to] = self.sides[i_from]
         self.sides[exchange[saved_ind + direction]] = tmp
 
-        set_name = set(self.name)
-        set_prev_name = set(self.prev_name)
-        old_letter = list(set_prev_name - set_name)
-        new_letter = list(set_name - set_prev_name)
+    def get_turned_name(self, side: str, direction: int) -> list[str]:
+        exchange = config.get_exchanges(self.model_name)['centers'][side]
+        turned = {letter: exchange[(i + direction) % len(exchange)] for i, letter in enumerate(exchange)}
+
+        return [turned.get(letter, letter) for letter in self.name]
 
-        if len(self.name) == 2:
-            self.name = replace_list(self.prev_name, old_letter, new_letter)
-        elif len(self.name) == 3:
-            self.name = reverse_replace_list(self.prev_name, old_letter, new_letter, side)
+    def turn(self, side: str, direction: int) -> None:
+        self.turn_sides(side, direction)
+        self.set_name(self.get_turned_name(side, direction))
 
-    def fill_shadow_detail(self, painter: QtDrawer, vertices: list[Point] | None,
+    def fill_shadow_detail(self, painter: QtDrawer, vertices: np.ndarray | None,
                            color_side: str | None, shadow: float | None) -> None:
-        color = (int(color * shadow) for color in self.colors[color_side])
-        painter.setBrush(QBrush(QColor(*color), Qt.SolidPattern))
+        painter.setBrush(self.brushes.get_brush(color_side, shadow))
         painter.fill(vertices)
 
-    def fill_detail(self, painter: QtDrawer, vertices: list[Point] | None, color_side: str | None) -> None:
-        color = self.colors[color_side]
-        painter.setBrush(QBrush(QColor(*color), Qt.SolidPattern))
+    def fill_detail(self, painter: QtDrawer, vertices: np.ndarray | None, color_side: str | None) -> None:
+        painter.setBrush(self.brushes.get_brush(color_side))
         painter.fill(vertices)
 
+    def get_sticker_vertices(self, side: str, points: np.ndarray | None = None) -> np.ndarray:
+        points = self.vertices if points is None else points
+        return points[self.loops[self.sides[side]]]
+
+    def get_stickers(self, points: np.ndarray | None = None) -> dict[str, np.ndarray]:
+        points = self.vertices if points is None else points
+        return {side: self.get_sticker_vertices(side, points) for side in self.sides
+                if config.SIDE_BITS[side] & self.mask}
+
+    def get_colors(self) -> dict[str, str]:
+        if self.colors_version != self.state.version:
+            faces, colors = self.state.faces, self.state.get_colors()
+            self.colors = {faces[slot]: colors[slot] for slot in self.facelets.tolist()}
+            self.colors_version = self.state.version
+
+        return self.colors
+
+    def get_sticker_plane(self, vertices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        center = vertices.sum(axis=0) / len(vertices)
+        if self.model_name == config.CUBE:
+            plane = vertices[[0, 2, 3]]
+        else:
+            plane = vertices[[0, 1, 2]]
+
+        return center, plane
+
     def draw(self, painter: QtDrawer, visible_sides: list[str], shadows: dict[str, float] | None = None) -> None:
+        colors = self.get_colors()
         for side in visible_sides:
-            if side in self.name:
-                vertices_pairs = []
-                for key in self.sides[side]:
-                    edge = self.edges[key]
-                    start, finish = self.vertices[edge.first], self.vertices[edge.second]
-                    vertices_pairs.append([start, finish])
-
-                vertices = get_vertices_by_pairs(vertices_pairs)
-                color_side = self.name_for_color[self.name.index(side)]
+            if side in colors:
+                vertices = self.get_sticker_vertices(side)
+                color_side = colors[side]
 
                 if not shadows:
                     self.fill_detail(painter, vertices, color_side)
@@ -131,175 +161,129 @@ class Detail:
                     self.fill_shadow_detail(painter, vertices, color_side, shadows[side])
 
     def draw_turning(self, painter: QtDrawer, visible_sides: list[str], turning_side: str,
-                     model_center: list[int] | None = None, light_sources: list[Point] | None = None) -> None:
+                     model_center: list[int] | None = None, light_sources: list[Point] | None = None,
+                     version: int | None = None, inner: bool = False) -> None:
         stickers_centers = {}
         sides_vertices = {}
+        points = self.vertices
         for side in self.sides:
-            vertices_pairs = []
-            for key in self.sides[side]:
-                edge = self.edges[key]
-                start, finish = self.vertices[edge.first], self.vertices[edge.second]
-                vertices_pairs.append([start, finish])
-
-            vertices = get_vertices_by_pairs(vertices_pairs)
-            center = 0
-            for vertex in vertices:
-                center += vertex.z
-            center /= len(vertices)
-            stickers_centers[side] = center
+            vertices = self.get_sticker_vertices(side, points)
+            stickers_centers[side] = vertices[:, 2].sum() / len(vertices)
             sides_vertices[side] = vertices
 
+        colors = self.get_colors()
         sides = sorted(stickers_centers, key=stickers_centers.get)
         for side in sides:
-            if side in self.name:
-                color_side = self.name_for_color[self.name.index(side)]
+            if side in colors:
+                color_side = colors[side]
                 if not light_sources:
                     self.fill_detail(painter, sides_vertices[side], color_side)
                 else:
-                    shadow = self.get_shadow(side, model_center, light_sources, sides_vertices[side])
+                    shadow = self.get_cached_shadow(side, model_center, light_sources, sides_vertices[side], version)
                     self.fill_shadow_detail(painter, sides_vertices[side], color_side, shadow)
 
-        opposite_side = self.cfg.get_opposite(turning_side)
-        if turning_side not in visible_sides:
-            if self.model_name == config.CUBE:
-                self.fill_detail(painter, sides_vertices[opposite_side], 'black')
+        if self.model_name == config.CUBE:
+            opposite_side = self.cfg.get_opposite(turning_side)
+            for side in (opposite_side, turning_side) if inner else (opposite_side,):
+                if self.cfg.get_opposite(side) not in visible_sides:
+                    self.fill_detail(painter, sides_vertices[side], 'black')
 
-    def get_center_z(self) -> float:
-        center = 0
-        for vertex in self.vertices.values():
-            center += vertex.z
-        return center / len(self.vertices)
+    def check_shadows_version(self, version: int) -> None:
+        if version != self.shadows_version:
+            self.shadows = {}
+            self.shadows_version = version
 
-    def get_center(self, vertices: dict[str, Point] | None = None) -> Point | None:
-        if not vertices:
-            return None
+    def set_cached_shadow(self, name: str, shadow: float, version: int) -> None:
+        self.check_shadows_version(version)
+        self.shadows[name] = shadow
 
-        center = Point()
+    def get_cached_shadow(self, name: str, model_center: list[int], light_sources: list[Point],
+                          vertices: np.ndarray | None = None, version: int | None = None) -> float | None:
+        if version is None:
+            return self.get_shadow(name, model_center, light_sources, vertices)
 
-        for vertex in vertices:
-            center += vertex
+        self.check_shadows_version(version)
+        if name not in self.shadows:
+            self.shadows[name] = self.get_shadow(name, model_center, light_sources, vertices)
 
-        return center / len(vertices)
+        return self.shadows[name]
 
-    def get_vertex_by_name(self, name: str) -> Point | None:
-        set_name = set(name)
-        for key in self.vertices:
-            if set(key) == set_name:
-                return self.vertices[key]
-        return None
+    def get_center_z(self) -> float:
+        return self.vertices[:, 2].sum() / len(self.keys)
 
-    def get_shadow(self, name: str, model_center: list[int], light_sources: list[Point],
-                   vertices: list[Point] | None = None) -> float | None:
-        if not light_sources or not vertices:
+    def get_center(self, vertices: np.ndarray | None = None) -> Point | None:
+        if vertices is None or not len(vertices):
             return None
 
-        center = self.get_center(vertices)
-
-        if self.model_name == config.CUBE:
-            plane_points = [vertices[0], *vertices[2:-1]]
-        elif self.model_name == config.PYRAMID:
-            plane_points = vertices[:-1]
-        else:
-            plane_points = []
+        return Point(*(vertices.sum(axis=0) / len(vertices)).tolist())
 
-        normal = Vector(MatrixPlane(plane_points).get_determinant()[:-1])
-        normal.adjust(center, Point(*model_center))
+    def get_shadow(self, name: str, model_center: list[int], light_sources: list[Point],
+                   vertices: np.ndarray | None = None) -> float | None:
+        if not light_sources or vertices is None or not len(vertices):
+            return None
 
-        cosine = 0
-        for light in light_sources:
-            cosine += get_plane_cosine(light, center, normal)
+        center, plane = self.get_sticker_plane(vertices)
+        normals = get_plane_normals(plane[np.newaxis])
 
-        if cosine <= 1:
-            return cosine
-        else:
-            return 1
+        return float(get_planes_shadows(light_sources, center[np.newaxis], normals, model_center)[0])
 
-    def get_vertices_by_edge(self, edge: str) -> tuple[Point, Point]:
-        return self.edges[edge].get_points(self.vertices)
+    def get_vertices_by_edge(self, edge: str) -> tuple[int, int]:
+        return self.edges[edge].get_points(self.keys)
 
 
 class Corner(Detail):
-    def __init__(self, vertices: dict[str, Point], edges: dict[str, Edge] | list[Edge],
+    def __init__(self, buffer: VertexBuffer, vertices: dict[str, Point], edges: dict[str, Edge] | list[Edge],
                  offset: Point, name: str, model_name: str):
-        super().__init__(vertices, edges, offset, name, model_name)
+        super().__init__(buffer, vertices, edges, offset, name, model_name)
 
 
 class Rib(Detail):
-    def __init__(self, vertices: dict[str, Point], edges: dict[str, Edge] | list[Edge],
+    def __init__(self, buffer: VertexBuffer, vertices: dict[str, Point], edges: dict[str, Edge] | list[Edge],
                  offset: Point, name: str, model_name: str):
-        super().__init__(vertices, edges, offset, name, model_name)
+        super().__init__(buffer, vertices, edges, offset, name, model_name)
 
 
 class Center(Detail):
-    def __init__(self, vertices: dict[str, Point], edges: dict[str, Edge] | list[Edge],
+    def __init__(self, buffer: VertexBuffer, vertices: dict[str, Point], edges: dict[str, Edge] | list[Edge],
                  offset: Point, name: str, model_name: str):
-        super().__init__(vertices, edges, offset, name, model_name, False)
-        self.color = self.colors[name]
-
-    def fill_shadow_detail(self, painter: QtDrawer, vertices: list[Point] | None = None,
-                           color_side: str | None = None, shadow: float | None = None) -> None:
-        color = (int(color * shadow) for color in self.color)
-        painter.setBrush(QBrush(QColor(*color), Qt.SolidPattern))
-        painter.fill(self.vertices.values())
-
-    def fill_detail(self, painter: QtDrawer, vertices: list[Point] | None = None,
-                    color_side: str | None = None) -> None:
-        painter.setBrush(QBrush(QColor(*self.color), Qt.SolidPattern))
-        painter.fill(self.vertices.values())
+        super().__init__(buffer, vertices, edges, offset, name, model_name, False)
 
     def draw(self, painter: QtDrawer, visible_sides: list[str], shadows: dict[str, float] | None = None) -> None:
+        (side, color_side), = self.get_colors().items()
         if not shadows:
-            self.fill_detail(painter)
+            self.fill_detail(painter, self.vertices, color_side)
         else:
-            self.fill_shadow_detail(painter, None, None, shadows[self.name[0]])
+            self.fill_shadow_detail(painter, self.vertices, color_side, shadows[side])
 
     def draw_turning(self, painter: QtDrawer, visible_sides: list[str], turning_side: str,
-                     model_center: list[int] | None = None, light_sources: list[Point] | None = None) -> None:
+                     model_center: list[int] | None = None, light_sources: list[Point] | None = None,
+                     version: int | None = None, inner: bool = False) -> None:
+        (side, color_side), = self.get_colors().items()
         if not light_sources:
-            self.fill_detail(painter)
+            self.fill_detail(painter, self.vertices, color_side)
         else:
-            shadow = self.get_shadow(self.name[0], model_center, light_sources)
-            self.fill_shadow_detail(painter, None, None, shadow)
-
-    def get_center(self, vertices: dict[str, Point] | None = None) -> Point | None:
-        center = Point()
-
-        for vertex in self.vertices:
-            center += self.vertices[vertex]
-
-        return center / len(self.vertices)
-
-    def get_shadow(self, name: str, model_center: list[int], light_sources: list[Point],
-                   vertices: list[Point] | None = None) -> float | None:
-        if not light_sources:
-            return None
+            shadow = self.get_cached_shadow(side, model_center, light_sources, version=version)
+            self.fill_shadow_detail(painter, self.vertices, color_side, shadow)
 
-        center = self.get_center()
+    def get_center(self, vertices: np.ndarray | None = None) -> Point | None:
+        return super().get_center(self.vertices)
 
-        vertices = list(self.vertices.values())
+    def turn(self, side: str, direction: int) -> None:
+        self.set_name(self.get_turned_name(side, direction))
 
-        if self.model_name == config.CUBE:
-            plane_points = [vertices[0], *vertices[2:]]
-        elif self.model_name == config.PYRAMID:
-            plane_points = vertices[:]
-        else:
-            plane_points = []
+    def get_rest_center(self) -> Point:
+        return super().get_center(self.rest_vertices)
 
-        normal = Vector(MatrixPlane(plane_points).get_determinant()[:-1])
-        normal.adjust(center, Point(*model_center))
+    def get_stickers(self, points: np.ndarray | None = None) -> dict[str, np.ndarray]:
+        return {self.name[0]: self.vertices if points is None else points}
 
-        cosine = 0
-        for light in light_sources:
-            cosine += get_plane_cosine(light, center, normal)
-
-        if cosine <= 1:
-            return cosine
-        else:
-            return 1
+    def get_shadow(self, name: str, model_center: list[int], light_sources: list[Point],
+                   vertices: np.ndarray | None = None) -> float | None:
+        return super().get_shadow(name, model_center, light_sources, self.vertices)
 
 
 class Corners:
-    def __init__(self, n: int, model_name: str):
+    def __init__(self, n: int, model_name: str, buffer: VertexBuffer):
         if model_name == config.CUBE:
             self.cfg = config.CubeConfig(n)
         elif model_name == config.PYRAMID:
@@ -307,7 +291,10 @@ class Corners:
         else:
             raise ValueError('Invalid model name param')
 
-        self.carcass = None
+        self.buffer = buffer
+        self.exchanges = config.get_exchanges(model_name)['corners']
+        self.carcass_keys = None
+        self.carcass_indices = None
         self.init_extra_points()
 
         vertices, edges = self.cfg.get_eccentric_data()
@@ -315,61 +302,75 @@ class Corners:
 
         self.corners = {}
         for key, value in positions.items():
-            self.corners[key] = Corner(deepcopy(vertices), edges, Point(*value), key, model_name)
+            self.corners[config.get_canonical_key(key)] = Corner(buffer, vertices, edges, Point(*value), key,
+                                                                 model_name)
+        self.masks = {key: config.get_mask(key) for key in self.corners}
+        self.mask_keys = {}
 
     def init_extra_points(self) -> None:
-        self.carcass = self.cfg.get_carcass()
-        for key in self.carcass:
-            self.carcass[key].move(config.Config().center)
+        carcass = self.cfg.get_carcass()
+        self.carcass_keys = {key: i for i, key in enumerate(carcass)}
+        self.carcass_indices = self.buffer.add(carcass.values())
+
+    @property
+    def carcass(self) -> dict[str, Point]:
+        points = self.buffer.points[self.carcass_indices]
+        return {key: Point(*points[i].tolist()) for key, i in self.carcass_keys.items()}
+
+    @property
+    def rest_carcass(self) -> dict[str, Point]:
+        points = self.buffer.rest[self.carcass_indices]
+        return {key: Point(*points[i].tolist()) for key, i in self.carcass_keys.items()}
+
+    def get_keys(self, mask: int, hidden: int = 0) -> list[str]:
+        if (mask, hidden) not in self.mask_keys:
+            self.mask_keys[mask, hidden] = [key for key, key_mask in self.masks.items()
+                                            if key_mask & mask and not key_mask & hidden]
+
+        return self.mask_keys[mask, hidden]
 
     def draw(self, painter: QtDrawer, visible_sides: list[str], shadows: dict[str, float] | None = None) -> None:
-        for key in self.corners:
-            if set(visible_sides) & set(key):
-                self.corners[key].draw(painter, visible_sides, shadows)
+        for key in self.get_keys(config.get_mask(visible_sides)):
+            self.corners[key].draw(painter, visible_sides, shadows)
 
     def draw_below_turning(self, painter: QtDrawer, visible_sides: list[str], side: str,
                            shadows: dict[str, float] | None = None) -> None:
-        for key in self.corners:
-            if set(visible_sides) & set(key) and side not in key:
-                self.corners[key].draw(painter, visible_sides, shadows)
+        for key in self.get_keys(config.get_mask(visible_sides), config.SIDE_BITS[side]):
+            self.corners[key].draw(painter, visible_sides, shadows)
 
-    def get_static_plastic_part(self, side: str, n: int) -> list[Point]:
+    def get_static_plastic_part(self, side: str, n: int, depth: int = 1) -> np.ndarray:
         def get_carcass_vertices(src_vertices):
-            vertices = []
+            indices = []
             for vertex in src_vertices:
                 set_vertex = set(vertex)
-                for key in self.carcass:
+                for key, i in self.carcass_keys.items():
                     if set_vertex == set(key):
-                        vertices.append(self.carcass[key])
+                        indices.append(i)
                         break
 
-            return vertices
+            return self.buffer.rest[self.carcass_indices][indices]
 
-        turning_vertices = self.cfg.get_exchanges_corners()[side]
+        turning_vertices = self.exchanges[side]
         opposite_side = self.cfg.get_opposite(side)
         below_vertices = [vertex.replace(side, opposite_side) for vertex in turning_vertices]
 
         upper_vertices = get_carcass_vertices(turning_vertices)
         lower_vertices = get_carcass_vertices(below_vertices)
 
-        alpha = n - 1
-        plastic_vertices = []
-        for up_vertex, low_vertex in zip(upper_vertices, lower_vertices):
-            plastic_vertices.append(divide_line_by_num(low_vertex, up_vertex, alpha))
-
-        return plastic_vertices
+        alpha = n - depth
+        return (depth * lower_vertices + alpha * upper_vertices) / n
 
-    def get_static_pyramid_plastic(self, side: str, copied: bool = True) -> list[Point]:
+    def get_static_pyramid_plastic(self, side: str) -> np.ndarray:
         vertices = self.cfg.get_plastic_vertices()[side][0]
         general = self.cfg.get_plastic_vertices()[side][1]
         plastic_vertices = []
 
         for vertex in vertices:
-            sides = {side: edges for side, edges in self.corners[vertex].sides.items() if side in general}
+            corner = self.corners[config.get_canonical_key(vertex)]
+            sides = {side: edges for side, edges in corner.sides.items() if side in general}
             vertices_by_sides = dict()
             for side, edges in sides.items():
-                vertices_by_sides[side] = [vert for edge in edges
-                                           for vert in self.corners[vertex].get_vertices_by_edge(edge)]
+                vertices_by_sides[side] = [vert for edge in edges for vert in corner.get_vertices_by_edge(edge)]
             general_vertex = None
             for verts in vertices_by_sides.values():
                 if general_vertex:
@@ -377,101 +378,45 @@ class Corners:
                 else:
                     general_vertex = set(verts)
 
-            if copied:
-                plastic_vertices.append(copy(next(iter(general_vertex))))
-            else:
-                plastic_vertices.append(next(iter(general_vertex)))
+            plastic_vertices.append(corner.rest_vertices[next(iter(general_vertex))])
 
-        return plastic_vertices
+        return np.array(plastic_vertices)
 
     def get_centers(self, side: str) -> dict[Corner, float]:
         corners_centers = {}
-        for key in self.corners:
-            if side in key:
-                corners_centers[self.corners[key]] = self.corners[key].get_center_z()
+        for key in self.get_keys(config.SIDE_BITS[side]):
+            corners_centers[self.corners[key]] = self.corners[key].get_center_z()
 
         return corners_centers
 
-    def move(self, point: Point) -> None:
-        for key in self.corners:
-            self.corners[key].move(point)
-        for key in self.carcass:
-            self.carcass[key].move(point)
-
-    def turn_ox(self, angle: float) -> None:
-        for key in self.corners:
-            self.corners[key].turn_ox(angle)
-        for key in self.carcass:
-            self.carcass[key].turn_ox(angle)
-
-    def turn_oy(self, angle: float) -> None:
-        for key in self.corners:
-            self.corners[key].turn_oy(angle)
-        for key in self.carcass:
-            self.carcass[key].turn_oy(angle)
-
-    def turn_oz(self, angle: float) -> None:
-        for key in self.corners:
-            self.corners[key].turn_oz(angle)
-        for key in self.carcass:
-            self.carcass[key].turn_oz(angle)
-
-    def scale(self, k: float, point: Point) -> None:
-        for key in self.corners:
-            self.corners[key].scale(k, point)
-        for key in self.carcass:
-            self.carcass[key].scale(k, point)
-
-    def turn_ox_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.corners:
-            self.corners[key].turn_ox_funcs(sin_angle, cos_angle)
-
-    def turn_oy_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.corners:
-            self.corners[key].turn_oy_funcs(sin_angle, cos_angle)
-
-    def turn_oz_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.corners:
-            self.corners[key].turn_oz_funcs(sin_angle, cos_angle)
-
-    def turn_side_oy(self, name: str, angle: float) -> None:
-        for key in self.corners:
-            if name in key:
-                self.corners[key].turn_oy(angle)
+    def get_side_indices(self, name: str) -> list[slice]:
+        return [self.corners[key].indices for key in self.get_keys(config.SIDE_BITS[name])]
 
     def update_sides(self, side: str, direction: int) -> None:
-        exchange = self.cfg.get_exchanges_corners()[side]
+        exchange = self.exchanges[side]
+        corners = [self.corners[key] for key in exchange]
 
-        dir_range = range(len(exchange) - 2, -1, -1) if direction > 0 else range(1, len(exchange))
-        saved_ind = -1 if direction > 0 else 0
+        for i, corner in enumerate(corners):
+            key = exchange[(i + direction) % len(exchange)]
+            self.corners[key] = corner
+            corner.set_name(key)
 
-        tmp = self.corners[find_by_key(self.corners, exchange[saved_ind])]
-        for i in dir_range:
-            i_to = find_by_key(self.corners, exchange[i + direction])
-            i_from = find_by_key(self.corners, exchange[i])
-            self.corners[i_to] = self.corners[i_from]
-            self.corners[i_to].set_name(i_to)
-        self.corners[find_by_key(self.corners, exchange[saved_ind + direction])] = tmp
-        self.corners[find_by_key(self.corners, exchange[saved_ind + direction])].set_name(
-            find_by_key(self.corners, exchange[saved_ind + direction])
-        )
-
-        for key in self.corners:
-            if side in key:
-                self.corners[key].update_sides(side, direction)
-
-    def create_plane_points(self) -> dict[str, list[Point]]:
+        for corner in corners:
+            corner.turn_sides(side, direction)
+
+    def create_plane_points(self, rest: bool = False) -> dict[str, list[Point]]:
         sides = self.cfg.get_sides()
+        carcass = self.rest_carcass if rest else self.carcass
         points = {}
 
         for key, value in sides.items():
-            points[key] = [self.carcass[value[i]] for i in range(len(value))]
+            points[key] = [carcass[value[i]] for i in range(len(value))]
 
         return points
 
 
 class Ribs:
-    def __init__(self, n: int, model_name: str):
+    def __init__(self, n: int, model_name: str, buffer: VertexBuffer):
         if model_name == config.CUBE:
             self.cfg = config.CubeConfig(n)
         elif model_name == config.PYRAMID:
@@ -479,109 +424,72 @@ class Ribs:
         else:
             raise ValueError('Invalid model name param')
 
+        self.buffer = buffer
+        self.exchanges = config.get_exchanges(model_name)['ribs']
         self.ribs = {}
         if n > 2:
             vertices, edges = self.cfg.get_eccentric_data()
             positions = self.cfg.get_offset_ribs()
             for key, value in positions.items():
-                self.ribs[key] = []
-                for position in positions[key]:
-                    self.ribs[key].append(Rib(deepcopy(vertices), edges, Point(*position), key, model_name))
+                self.ribs[config.get_canonical_key(key)] = [
+                    Rib(buffer, vertices, edges, Point(*position), key, model_name) for position in value
+                ]
+        self.masks = {key: config.get_mask(key) for key in self.ribs}
+        self.mask_keys = {}
+
+    def get_keys(self, mask: int, hidden: int = 0) -> list[str]:
+        if (mask, hidden) not in self.mask_keys:
+            self.mask_keys[mask, hidden] = [key for key, key_mask in self.masks.items()
+                                            if key_mask & mask and not key_mask & hidden]
+
+        return self.mask_keys[mask, hidden]
 
     def draw(self, painter: QtDrawer, visible_sides: list[str], shadows: dict[str, float] | None = None) -> None:
-        for key in self.ribs:
-            if set(visible_sides) & set(key):
-                for rib in self.ribs[key]:
-                    rib.draw(painter, visible_sides, shadows)
+        for key in self.get_keys(config.get_mask(visible_sides)):
+            for rib in self.ribs[key]:
+                rib.draw(painter, visible_sides, shadows)
 
     def draw_below_turning(self, painter: QtDrawer, visible_sides: list[str], side: str,
                            shadows: dict[str, float] | None = None) -> None:
-        for key in self.ribs:
-            if set(visible_sides) & set(key) and side not in key:
-                for rib in self.ribs[key]:
-                    rib.draw(painter, visible_sides, shadows)
+        for key in self.get_keys(config.get_mask(visible_sides), config.SIDE_BITS[side]):
+            for rib in self.ribs[key]:
+                rib.draw(painter, visible_sides, shadows)
 
     def get_centers(self, side: str) -> dict[Rib, float]:
         ribs_centers = {}
-        for key in self.ribs:
-            if side in key:
-                for rib in self.ribs[key]:
-                    ribs_centers[rib] = rib.get_center_z()
-
-        return ribs_centers
-
-    def move(self, point: Point) -> None:
-        for key in self.ribs:
-            for rib in self.ribs[key]:
-                rib.move(point)
-
-    def turn_ox(self, angle: float) -> None:
-        for key in self.ribs:
-            for rib in self.ribs[key]:
-                rib.turn_ox(angle)
-
-    def turn_oy(self, angle: float) -> None:
-        for key in self.ribs:
-            for rib in self.ribs[key]:
-                rib.turn_oy(angle)
-
-    def turn_oz(self, angle: float) -> None:
-        for key in self.ribs:
-            for rib in self.ribs[key]:
-                rib.turn_oz(angle)
-
-    def scale(self, k: float, point: Point) -> None:
-        for key in self.ribs:
-            for rib in self.ribs[key]:
-                rib.scale(k, point)
-
-    def turn_ox_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.ribs:
-            for rib in self.ribs[key]:
-                rib.turn_ox_funcs(sin_angle, cos_angle)
-
-    def turn_oy_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.ribs:
+        for key in self.get_keys(config.SIDE_BITS[side]):
             for rib in self.ribs[key]:
-                rib.turn_oy_funcs(sin_angle, cos_angle)
+                ribs_centers[rib] = rib.get_center_z()
 
-    def turn_oz_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.ribs:
-            for rib in self.ribs[key]:
-                rib.turn_oz_funcs(sin_angle, cos_angle)
+        return ribs_centers
 
-    def turn_side_oy(self, name: str, angle: float) -> None:
-        for key in self.ribs:
-            if name in key:
-                for rib in self.ribs[key]:
-                    rib.turn_oy(angle)
+    def get_side_indices(self, name: str) -> list[slice]:
+        return [rib.indices for key in self.get_keys(config.SIDE_BITS[name]) for rib in self.ribs[key]]
 
     def update_sides(self, side: str, direction: int) -> None:
-        exchange = self.cfg.get_exchanges_ribs()[side]
+        exchange = self.exchanges[side]
+        groups = [self.ribs[key] for key in exchange]
 
-        dir_range = range(len(exchange) - 2, -1, -1) if direction > 0 else range(1, len(exchange))
-        saved_ind = -1 if direction > 0 else 0
+        for i, ribs in enumerate(groups):
+            key = exchange[(i + direction) % len(exchange)]
+            self.ribs[key] = ribs
+            for rib in ribs:
+                rib.set_name(key)
 
-        tmp = self.ribs[find_by_key(self.ribs, exchange[saved_ind])]
-        for i in dir_range:
-            i_to = find_by_key(self.ribs, exchange[i + direction])
-            i_from = find_by_key(self.ribs, exchange[i])
-            self.ribs[i_to] = self.ribs[i_from]
-            for j in range(len(self.ribs[i_to])):
-                self.ribs[i_to][j].set_name(i_to)
-        self.ribs[find_by_key(self.ribs, exchange[saved_ind + direction])] = tmp
-        for j in range(len(self.ribs[find_by_key(self.ribs, exchange[saved_ind + direction])])):
-            self.ribs[find_by_key(self.ribs, exchange[saved_ind + direction])][j].set_name(
-                find_by_key(self.ribs, exchange[saved_ind + direction]))
-
-        for key in self.ribs:
-            if side in key:
-                for rib in self.ribs[key]:
-                    rib.update_sides(side, direction)
+        for ribs in groups:
+            for rib in ribs:
+                rib.turn_sides(side, direction)
+
+    def turn_details(self, ribs: list[Rib], side: str, direction: int) -> None:
+        for rib in ribs:
+            self.ribs[config.get_canonical_key(rib.name)].remove(rib)
+        for rib in ribs:
+            rib.turn(side, direction)
+            self.ribs[config.get_canonical_key(rib.name)].append(rib)
 
 
 class Centers:
-    def __init__(self, n: int, model_name: str):
+    def __init__(self, n: int, model_name: str, buffer: VertexBuffer):
         if model_name == config.CUBE:
             self.cfg = config.CubeConfig(n)
         elif model_name == config.PYRAMID:
@@ -591,7 +499,10 @@ class Centers:
 
         self.model_name = model_name
 
-        self.sides_centers = None
+        self.buffer = buffer
+        self.exchanges = config.get_exchanges(model_name)['centers']
+        self.sides_centers_keys = None
+        self.sides_centers_indices = None
         self.init_sides_centers()
         self.n = n
 
@@ -603,12 +514,22 @@ class Centers:
 
                 self.centers[key] = []
                 for position in positions[key]:
-                    self.centers[key].append(Center(deepcopy(vertices), edges, Point(*position), key, model_name))
+                    self.centers[key].append(Center(buffer, vertices, edges, Point(*position), key, model_name))
 
     def init_sides_centers(self) -> None:
-        self.sides_centers = self.cfg.get_sides_centers()
-        for key in self.sides_centers:
-            self.sides_centers[key].move(config.Config().center)
+        sides_centers = self.cfg.get_sides_centers()
+        self.sides_centers_keys = {key: i for i, key in enumerate(sides_centers)}
+        self.sides_centers_indices = self.buffer.add(sides_centers.values())
+
+    @property
+    def sides_centers(self) -> dict[str, Point]:
+        points = self.buffer.points[self.sides_centers_indices]
+        return {key: Point(*points[i].tolist()) for key, i in self.sides_centers_keys.items()}
+
+    @property
+    def rest_sides_centers(self) -> dict[str, Point]:
+        points = self.buffer.rest[self.sides_centers_indices]
+        return {key: Point(*points[i].tolist()) for key, i in self.sides_centers_keys.items()}
 
     def draw(self, painter: QtDrawer, visible_sides: list[str], shadows: dict[str, float] | None = None) -> None:
         if self.n == 2:
@@ -644,97 +565,43 @@ class Centers:
 
         return center_centers
 
-    def move(self, point: Point) -> None:
-        for key in self.centers:
-            for center in self.centers[key]:
-                center.move(point)
-        for key in self.sides_centers:
-            self.sides_centers[key].move(point)
-
-    def turn_ox(self, angle: float) -> None:
-        for key in self.centers:
-            for center in self.centers[key]:
-                center.turn_ox(angle)
-        for key in self.sides_centers:
-            self.sides_centers[key].turn_ox(angle)
-
-    def turn_oy(self, angle: float) -> None:
-        for key in self.centers:
-            for center in self.centers[key]:
-                center.turn_oy(angle)
-        for key in self.sides_centers:
-            self.sides_centers[key].turn_oy(angle)
-
-    def turn_oz(self, angle: float) -> None:
-        for key in self.centers:
-            for center in self.centers[key]:
-                center.turn_oz(angle)
-        for key in self.sides_centers:
-            self.sides_centers[key].turn_oz(angle)
-
-    def scale(self, k: float, point: Point) -> None:
-        for key in self.centers:
-            for center in self.centers[key]:
-                center.scale(k, point)
-        for key in self.sides_centers:
-            self.sides_centers[key].scale(k, point)
-
-    def turn_ox_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.centers:
-            for center in self.centers[key]:
-                center.turn_ox_funcs(sin_angle, cos_angle)
-
-    def turn_oy_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.centers:
-            for center in self.centers[key]:
-                center.turn_oy_funcs(sin_angle, cos_angle)
-
-    def turn_oz_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        for key in self.centers:
-            for center in self.centers[key]:
-                center.turn_oz_funcs(sin_angle, cos_angle)
-
-    def turn_side_oy(self, name: str, angle: float, centers: dict[str, list[Center]] | None = None) -> None:
-        for key in self.centers:
-            if name in key:
-                for center in self.centers[key]:
-                    center.turn_oy(angle)
+    def get_side_indices(self, name: str, centers: dict[str, list[Center]] | None = None) -> list[slice]:
+        indices = [center.indices for key in self.centers if name in key for center in self.centers[key]]
 
         if self.model_name == config.PYRAMID and centers:
-            for key in centers:
-                for center in centers[key]:
-                    center.turn_oy(angle)
+            indices += [center.indices for key in centers for center in centers[key]]
+
+        return indices
 
     def update_sides(self, side: str, direction: int, centers: dict[str, list[Center]],
                      extra: dict[str, list[Center]]) -> None:
-        exchange = self.cfg.get_exchanges_centers()[side]
+        exchange = self.exchanges[side]
+        groups = [centers[key] for key in exchange]
 
-        dir_range = range(len(exchange) - 2, -1, -1) if direction > 0 else range(1, len(exchange))
-        saved_ind = -1 if direction > 0 else 0
-
-        tmp = centers[find_by_key(centers, exchange[saved_ind])]
-        for i in dir_range:
-            i_to = find_by_key(centers, exchange[i + direction])
-            i_from = find_by_key(centers, exchange[i])
-            centers[i_to] = centers[i_from]
-            for j in range(len(centers[i_to])):
-                centers[i_to][j].set_name(i_to)
-        centers[find_by_key(centers, exchange[saved_ind + direction])] = tmp
-        for j in range(len(centers[find_by_key(centers, exchange[saved_ind + direction])])):
-            centers[find_by_key(centers, exchange[saved_ind + direction])][j].set_name(
-                find_by_key(centers, exchange[saved_ind + direction]))
+        for i, group in enumerate(groups):
+            key = exchange[(i + direction) % len(exchange)]
+            centers[key] = group
+            for center in group:
+                center.set_name(key)
 
         for key in centers:
             self.centers[key] = centers[key] + extra[key]
 
+    def turn_details(self, centers: list[Center], side: str, direction: int) -> None:
+        for center in centers:
+            self.centers[center.name[0]].remove(center)
+        for center in centers:
+            center.turn(side, direction)
+            self.centers[center.name[0]].append(center)
+
     def get_turning_centers(self, name: str) -> tuple[dict[str, list[Center]], dict[str, list[Center]]]:
         centers = dict()
         extra = dict()
 
-        side_center = self.sides_centers[name]
+        side_center = self.rest_sides_centers[name]
         for key in self.centers:
             if name not in key:
-                distances = [(round(side_center.get_dist_to_point(center.get_center())), center)
+                distances = [(round(side_center.get_dist_to_point(center.get_rest_center())), center)
                              for center in self.centers[key]]
                 distances.sort(key=lambda x: x[0])
 
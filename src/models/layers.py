@@ -0,0 +1,36 @@
+import numpy as np
+
+Turn = tuple[str, int]
+
+
+class LayerIndex:
+    def __init__(self, layers: dict[tuple[str, int], np.ndarray], permutations: dict[Turn, np.ndarray]):
+        self.layers = layers
+        self.permutations = permutations
+        self.occupants = np.arange(len(next(iter(permutations.values()))))
+
+    def get_slots(self, side: str, first: int, last: int) -> np.ndarray:
+        if first == last:
+            return self.layers[side, first]
+
+        return np.concatenate([self.layers[side, layer] for layer in range(first, last + 1)])
+
+    def get_members(self, side: str, first: int, last: int) -> np.ndarray:
+        return self.occupants[self.get_slots(side, first, last)]
+
+    def turn(self, side: str, direction: int, first: int, last: int) -> None:
+        slots = self.get_slots(side, first, last)
+        self.occupants[slots] = self.occupants[self.permutations[side, direction][slots]]
+
+
+def get_layers(centers: np.ndarray, pivot: np.ndarray, sides_centers: dict[str, np.ndarray],
+               n: int) -> dict[tuple[str, int], np.ndarray]:
+    layers = {}
+    for side, center in sides_centers.items():
+        axis = center - pivot
+        depths = 1 - (centers - pivot) @ axis / (axis @ axis)
+        numbers = np.clip(np.floor(depths * n / 2), 0, n - 1).astype(int)
+        for layer in range(n):
+            layers[side, layer] = np.flatnonzero(numbers == layer)
+
+    return layers
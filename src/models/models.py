@@ -1,16 +1,29 @@
+import re
+from typing import Callable
+
+from src.design.brushes import get_brush_cache
 from src.design.drawer import QtDrawer
-from src.general.config import Config, CubeConfig, PyramidConfig, EPS, CUBE, PYRAMID
-from src.models.details import Corners, Ribs, Centers
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPen, QBrush, QColor
+from src.general.config import Config, CubeConfig, PyramidConfig, EPS, CUBE, PYRAMID, MERGE_STICKERS_SIZE, get_mask
+from src.models.details import Detail, Corners, Ribs, Centers, Rib, Center
+from src.models.layers import LayerIndex, get_layers
+from src.models.state import FaceletState, get_permutation
+from PyQt5.QtCore import Qt, QPoint, QRect
+from PyQt5.QtGui import QPen, QImage
+import numpy as np
+from src.utils.buffer import VertexBuffer, join_indices
 from src.utils.point import Point
-from src.utils.matrix import MatrixPlane, MatrixBody
-from src.utils.mymath import Vector, Angle, get_plane_cosine
+from src.utils.matrix import MatrixPlane, MatrixBody, RotationGroup, get_axis_turn_matrix, get_move_matrix
+from src.utils.matrix import get_normal_matrix, get_rotation_matrix, get_scale_matrix, transform_points
+from src.utils.mymath import Vector, get_plane_normals, get_planes_shadows, merge_regions
+
+TURN_PATTERN = re.compile(r'(\d*)([A-Z])(w?)')
 
 
 class Model:
-    def __init__(self, corners: Corners, ribs: Ribs, centers: Centers, n: int, model_name: str):
+    def __init__(self, corners: Corners, ribs: Ribs, centers: Centers, buffer: VertexBuffer,
+                 n: int, model_name: str):
         self.n = n
+        self.buffer = buffer
         self.corners = corners
         self.ribs = ribs
         self.centers = centers
@@ -21,6 +34,7 @@ class Model:
             self.cfg = PyramidConfig(n)
         else:
             raise ValueError('Invalid model name param')
+        self.brushes = get_brush_cache(model_name)
 
         self.k = 1
 
@@ -32,41 +46,130 @@ class Model:
         self.viewer = [dx, dy, dz + 100000, 0]
         self.matrix_body = None
 
+        self.to_center = get_move_matrix(self.center_point)
+        self.from_center = get_move_matrix(-self.center_point)
+        self.view = self.to_center
+        self.projected = False
+        self.version = 0
+
+        self.pivot = None
+        self.turning_angle = 0
+        self.turning_indices = None
+        self.turning_layer = None
+        self.turning_matrices = {}
+        self.init_rotations()
+
+        self.face_normals = None
+        self.face_points = None
+        self.init_face_normals()
+
         self.light_sources = []
+        self.shadows = None
+
+        self.static_images = {}
 
         self.visible_sides = []
+        self.project()
+
+        self.state = None
+        self.facelets = None
+
+    def project(self) -> None:
+        if self.projected:
+            return
+
+        self.buffer.project(self.view)
         self.set_visible_sides()
+        self.projected = True
+
+    def invalidate(self, geometry: bool = True, static: bool = True) -> None:
+        if geometry:
+            self.projected = False
+        if static:
+            self.static_images = {}
+        self.shadows = None
+        self.version += 1
+
+    def get_bounds(self, indices: np.ndarray | slice | None = None, margin: int = 5) -> QRect:
+        points = self.buffer.rest[self.corners.carcass_indices if indices is None else indices]
+        if indices is None and self.turning_indices is not None:
+            points = np.concatenate((points, self.buffer.rest[self.turning_indices]))
+        points = self.project_points(points)
+        x0, y0 = np.floor(points[:, :2].min(axis=0)).astype(int) - margin
+        x1, y1 = np.ceil(points[:, :2].max(axis=0)).astype(int) + margin
+
+        return QRect(QPoint(int(x0), int(y0)), QPoint(int(x1), int(y1)))
+
+    def project_points(self, points: np.ndarray) -> np.ndarray:
+        return transform_points(points, self.view)
+
+    def transform_view(self, matrix: np.ndarray) -> None:
+        self.view = self.to_center @ matrix @ self.from_center @ self.view
+        self.invalidate()
 
     def draw(self, painter: QtDrawer) -> None:
+        self.project()
+
         pen = QPen(Qt.black, 6)
         painter.setPen(pen)
         shadows = None if not self.light_sources else self.count_shadows()
 
+        painter.begin_batch()
         self.corners.draw(painter, self.visible_sides, shadows)
         self.ribs.draw(painter, self.visible_sides, shadows)
         self.centers.draw(painter, self.visible_sides, shadows)
+        painter.end_batch()
 
-    def draw_turning(self, painter: QtDrawer, side: str, plastic_part: list[Point]) -> None:
-        def draw_below_turning(shadows_=None):
-            self.ribs.draw_below_turning(painter, self.visible_sides, side, shadows_)
-            self.centers.draw(painter, self.visible_sides, shadows_)
-            self.corners.draw_below_turning(painter, self.visible_sides, side, shadows_)
+    def draw_turning(self, painter: QtDrawer, side: str, plastic_part: np.ndarray) -> None:
+        def draw_below_turning(painter_: QtDrawer) -> None:
+            shadows = None if not self.light_sources else self.count_shadows()
+            painter_.begin_batch()
+            self.ribs.draw_below_turning(painter_, self.visible_sides, side, shadows)
+            self.centers.draw(painter_, self.visible_sides, shadows)
+            self.corners.draw_below_turning(painter_, self.visible_sides, side, shadows)
+            painter_.end_batch()
 
-        def draw_static_plastic_part():
-            painter.setBrush(QBrush(QColor('black'), Qt.SolidPattern))
-            painter.fill(plastic_part)
+        def draw_static_part(painter_: QtDrawer) -> None:
+            draw_below_turning(painter_)
+            painter_.setBrush(self.brushes.get_brush('black'))
+            painter_.fill(self.project_points(plastic_part))
+
+        self.project()
 
         pen = QPen(Qt.black, 6)
         painter.setPen(pen)
-        shadows = None if not self.light_sources else self.count_shadows()
 
         if side in self.visible_sides:
-            draw_below_turning(shadows)
-            draw_static_plastic_part()
+            self.draw_static(painter, side, draw_static_part)
             self.artist(painter, side)
         else:
             self.artist(painter, side)
-            draw_below_turning(shadows)
+            self.draw_static(painter, side, draw_below_turning)
+
+    def draw_static(self, painter: QtDrawer, side: str | tuple[str, str], draw: Callable[[QtDrawer], None]) -> None:
+        if painter.depth_test:
+            draw(painter)
+            return
+
+        device = painter.device()
+        ratio = device.devicePixelRatioF()
+        key = (side, device.width(), device.height(), ratio)
+
+        if key not in self.static_images:
+            image = QImage(round(device.width() * ratio), round(device.height() * ratio),
+                           QImage.Format_ARGB32_Premultiplied)
+            image.setDevicePixelRatio(ratio)
+            image.fill(Qt.transparent)
+
+            static_painter = QtDrawer()
+            static_painter.begin(image)
+            static_painter.setPen(painter.pen())
+            draw(static_painter)
+            static_painter.end()
+
+            self.static_images[key] = image
+
+        painter.drawImage(0, 0, self.static_images[key])
 
     def artist(self, painter: QtDrawer, side: str) -> None:
         corners = self.corners.get_centers(side)
@@ -75,151 +178,199 @@ class Model:
 
         eccentric = corners | ribs | centers
         details = sorted(eccentric, key=eccentric.get)
+        if self.light_sources:
+            self.shade_details(details)
 
         for detail in details:
-            detail.draw_turning(painter, self.visible_sides, side, self.matrix_center[:-1], self.light_sources)
+            detail.draw_turning(painter, self.visible_sides, side, self.matrix_center[:-1], self.light_sources,
+                                self.version)
 
-    def get_static_plastic_part(self, side: str) -> list[Point]:
+    def get_static_plastic_part(self, side: str) -> np.ndarray:
         return self.corners.get_static_plastic_part(side, self.n)
 
     def count_shadows(self) -> dict[str, float | None]:
-        shadows = {}
-        for side in self.visible_sides:
-            shadows[side] = self.get_shadow(side)
+        self.project()
+        if self.shadows is None:
+            sides = self.matrix_body.sides
+            visible = [sides.index(side) for side in self.visible_sides]
+
+            points = self.buffer.points[self.centers.sides_centers_indices]
+            centers = points[[self.centers.sides_centers_keys[side] for side in self.visible_sides]]
+            normals = self.matrix_body.coefficients[visible, :-1]
 
-        return shadows
+            shadows = get_planes_shadows(self.light_sources, centers, normals, self.matrix_center[:-1])
+            self.shadows = dict(zip(self.visible_sides, shadows.tolist()))
+
+        return self.shadows
 
     def get_shadow(self, position_side: str) -> float | None:
         if not self.light_sources:
             return None
 
-        side = self.cfg.get_sides()[position_side]
-        center = self.centers.sides_centers[position_side]
+        return self.count_shadows().get(position_side)
 
-        plane_points = [self.corners.carcass[key] for key in side]
-        normal = Vector(MatrixPlane(plane_points).get_determinant()[:-1])
-        normal.adjust(center, Point(*self.matrix_center[:-1]))
+    def shade_details(self, details: list[Detail]) -> None:
+        details = [detail for detail in details if detail.shadows_version != self.version]
+        stickers = [(detail, name, vertices) for detail in details for name, vertices in detail.get_stickers().items()]
+        if not stickers:
+            return
 
-        cosine = 0
-        for light in self.light_sources:
-            cosine += get_plane_cosine(light, center, normal)
+        centers, planes = zip(*(detail.get_sticker_plane(vertices) for detail, _, vertices in stickers))
+        normals = get_plane_normals(np.array(planes))
+        shadows = get_planes_shadows(self.light_sources, np.array(centers), normals, self.matrix_center[:-1])
 
-        if cosine <= 1:
-            return cosine
-        else:
-            return 1
+        for (detail, name, _), shadow in zip(stickers, shadows.tolist()):
+            detail.set_cached_shadow(name, shadow, self.version)
 
     def scale(self, k: float) -> None:
         k = k if k else 1
         tmp = k / self.k
 
-        self.corners.scale(tmp, self.center_point)
-        self.ribs.scale(tmp, self.center_point)
-        self.centers.scale(tmp, self.center_point)
+        self.transform_view(get_scale_matrix(tmp))
 
         self.k = k
 
     def move(self, point: Point) -> None:
-        self.corners.move(point)
-        self.ribs.move(point)
-        self.centers.move(point)
+        self.view = get_move_matrix(point) @ self.view
+        self.invalidate()
 
     def turn_ox(self, angle: int | float) -> None:
-        self.move(-self.center_point)
-
-        self.corners.turn_ox(angle)
-        self.ribs.turn_ox(angle)
-        self.centers.turn_ox(angle)
-
-        self.move(self.center_point)
-
-        self.set_visible_sides()
+        self.transform_view(get_axis_turn_matrix('x', angle))
 
     def turn_oy(self, angle: int | float) -> None:
-        self.move(-self.center_point)
-
-        self.corners.turn_oy(angle)
-        self.ribs.turn_oy(angle)
-        self.centers.turn_oy(angle)
-
-        self.move(self.center_point)
-
-        self.set_visible_sides()
+        self.transform_view(get_axis_turn_matrix('y', angle))
 
     def turn_oz(self, angle: int | float) -> None:
-        self.move(-self.center_point)
+        self.transform_view(get_axis_turn_matrix('z', angle))
 
-        self.corners.turn_oz(angle)
-        self.ribs.turn_oz(angle)
-        self.centers.turn_oz(angle)
+    def init_rotations(self) -> None:
+        carcass = self.buffer.rest[self.corners.carcass_indices]
+        self.pivot = Point(*(carcass.sum(axis=0) / len(carcass)).tolist())
 
-        self.move(self.center_point)
+        turn_angle = self.cfg.get_turn_angle()
+        generators = [self.get_turning_matrix(side, turn_angle) for side in self.cfg.get_sides()]
+        self.buffer.init_rotations(RotationGroup(generators), self.pivot)
 
-        self.set_visible_sides()
-
-    def turn_ox_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        self.corners.turn_ox_funcs(sin_angle, cos_angle)
-        self.ribs.turn_ox_funcs(sin_angle, cos_angle)
-        self.centers.turn_ox_funcs(sin_angle, cos_angle)
+    def get_turning_matrix(self, name: str, angle: float) -> np.ndarray:
+        key = (name, angle)
+        if key not in self.turning_matrices:
+            axis = Vector(self.pivot, self.centers.rest_sides_centers[name])
+            self.turning_matrices[key] = get_rotation_matrix(axis, angle)
 
-    def turn_oy_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        self.corners.turn_oy_funcs(sin_angle, cos_angle)
-        self.ribs.turn_oy_funcs(sin_angle, cos_angle)
-        self.centers.turn_oy_funcs(sin_angle, cos_angle)
+        return self.turning_matrices[key]
 
-    def turn_oz_funcs(self, sin_angle: float, cos_angle: float) -> None:
-        self.corners.turn_oz_funcs(sin_angle, cos_angle)
-        self.ribs.turn_oz_funcs(sin_angle, cos_angle)
-        self.centers.turn_oz_funcs(sin_angle, cos_angle)
+    def get_side_indices(self, name: str) -> np.ndarray:
+        indices = self.corners.get_side_indices(name) + self.ribs.get_side_indices(name)
+        indices += self.centers.get_side_indices(name)
 
-    def turn_side_elements(self, name: str, angle: float, alpha: Angle, beta: Angle):
-        self.turn_oz_funcs(alpha.sin, alpha.cos)
-        self.turn_ox_funcs(beta.sin, beta.cos)
+        return join_indices(indices)
 
-        self.corners.turn_side_oy(name, angle)
-        self.ribs.turn_side_oy(name, angle)
-        self.centers.turn_side_oy(name, angle)
+    def get_turn(self, name: str) -> tuple[str, int, int]:
+        if name not in self.cfg.get_sides():
+            raise ValueError(f'Incorrect turn "{name}"')
 
-        self.turn_ox_funcs(-beta.sin, beta.cos)
-        self.turn_oz_funcs(-alpha.sin, alpha.cos)
+        return name, 0, 0
 
     def turn_side(self, name: str, angle: float) -> None:
-        self.move(-self.center_point)
+        self.set_turning_angle(name, self.turning_angle + angle)
 
-        direction_vector = Vector(self.centers.sides_centers[name])
-        direction_vector.normalize()
-        d = direction_vector.get_length_xy()
+    def set_turning_angle(self, name: str, angle: float) -> None:
+        if self.turning_indices is None:
+            self.turning_indices = self.get_side_indices(name)
+            self.turning_layer = self.buffer.get_layer(self.turning_indices)
+        self.turning_angle = angle
 
-        alpha = Angle()  # to yz plane
-        beta = Angle()  # to y
-        try:
-            alpha.set_cos(direction_vector.y / d)
-            alpha.set_sin(direction_vector.x / d)
-        except ZeroDivisionError:
-            alpha.set_cos(1)
-            alpha.set_sin(0)
-        beta.set_cos(d)
-        beta.set_sin(-direction_vector.z)
+        rotation = self.get_turning_matrix(self.get_turn(name)[0], self.turning_angle)
+        self.buffer.turn(self.turning_indices, self.turning_layer, rotation)
+        self.invalidate(static=False)
 
-        self.turn_side_elements(name, angle, alpha, beta)
+    def snap_side(self, name: str) -> None:
+        indices = self.get_side_indices(name) if self.turning_indices is None else self.turning_indices
+        rotation = self.buffer.group.find(self.get_turning_matrix(self.get_turn(name)[0], self.turning_angle))
 
-        self.move(self.center_point)
+        self.buffer.rotate(rotation, indices)
+        self.buffer.regenerate(indices)
+        self.turning_angle = 0
+        self.turning_indices = None
+        self.turning_layer = None
+        self.invalidate()
 
     def update_sides(self, side: str, direction: int) -> None:
+        self.snap_side(side)
+
         self.corners.update_sides(side, direction)
         if self.n > 2:
             self.ribs.update_sides(side, direction)
-
-    def set_matrix_body(self) -> None:
-        sides = self.corners.create_plane_points()
+        self.move_state(side, direction)
+        self.invalidate()
+
+    def move_state(self, name: str, direction: int) -> None:
+        self.state.move(name, direction)
+        self.facelets[:] = self.state.permutations[name, -direction][self.facelets]
+
+    def get_details(self) -> list[Detail]:
+        details: list[Detail] = list(self.corners.corners.values())
+        details += [rib for ribs in self.ribs.ribs.values() for rib in ribs]
+        details += [center for centers in self.centers.centers.values() for center in centers]
+
+        return details
+
+    def get_layer_names(self) -> list[str]:
+        return list(self.cfg.get_sides())
+
+    def get_layer_indices(self, name: str) -> np.ndarray:
+        return self.get_side_indices(name)
+
+    def get_facelet_order(self, faces: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        return np.argsort(faces, kind='stable')
+
+    def init_state(self) -> None:
+        sides = list(self.cfg.get_sides())
+        details, faces, centers, ends = [], [], [], []
+        for detail in self.get_details():
+            for side, vertices in detail.get_stickers(detail.rest_vertices).items():
+                details.append(detail.indices.start)
+                faces.append(sides.index(side))
+                centers.append(np.unique(vertices, axis=0).mean(axis=0))
+            ends.append(len(faces))
+
+        order = self.get_facelet_order(np.array(faces), np.array(centers))
+        details, faces, centers = np.array(details)[order], np.array(faces)[order], np.array(centers)[order]
+        pivot = np.array([self.pivot.x, self.pivot.y, self.pivot.z])
+        angle = self.cfg.get_turn_angle()
+
+        permutations = {}
+        for name in self.get_layer_names():
+            layer = np.isin(details, self.get_layer_indices(name))
+            for direction in (1, -1):
+                rotation = self.get_turning_matrix(self.get_turn(name)[0], direction * angle)
+                permutations[name, direction] = get_permutation(centers, layer, rotation, pivot)
+
+        self.state = FaceletState(sides, faces, permutations)
+        self.facelets = np.empty(len(order), dtype=np.intp)
+        self.facelets[order] = np.arange(len(order))
+        for detail, start, stop in zip(self.get_details(), [0] + ends, ends):
+            detail.state, detail.facelets = self.state, self.facelets[start:stop]
+
+    def init_face_normals(self) -> None:
+        sides = self.corners.create_plane_points(rest=True)
         coefficients = {}
 
         for key, value in sides.items():
             plane = MatrixPlane(value)
             coefficients[key] = plane.get_determinant()
 
-        self.matrix_body = MatrixBody(coefficients)
-        self.matrix_body.adjust(self.matrix_center)
+        body = MatrixBody(coefficients)
+        body.adjust([self.pivot.x, self.pivot.y, self.pivot.z, 1])
+
+        self.face_normals = body.coefficients[:, :-1]
+        self.face_points = np.array([[value[0].x, value[0].y, value[0].z] for value in sides.values()])
+
+    def set_matrix_body(self) -> None:
+        normals = self.face_normals @ get_normal_matrix(self.view).T
+        points = self.project_points(self.face_points)
+
+        self.matrix_body = MatrixBody.from_normals(list(self.cfg.get_sides()), normals, points)
 
     def set_visible_sides(self) -> None:
         self.set_matrix_body()
@@ -230,56 +381,248 @@ class Model:
 
     def add_light(self, point: Point) -> None:
         self.light_sources.append(point)
+        self.invalidate(geometry=False)
 
     def del_light(self, point: Point) -> None:
         self.light_sources.remove(point)
+        self.invalidate(geometry=False)
 
 
 class Cube(Model):
     def __init__(self, n: int):
-        corners = Corners(n, CUBE)
-        ribs = Ribs(n, CUBE)
-        centers = Centers(n, CUBE)
+        if n < 2:
+            raise ValueError(f'Unsupported cube size {n}, a cube needs at least 2 layers')
+
+        buffer = VertexBuffer()
+        corners = Corners(n, CUBE, buffer)
+        ribs = Ribs(n, CUBE, buffer)
+        centers = Centers(n, CUBE, buffer)
+
+        super().__init__(corners, ribs, centers, buffer, n, CUBE)
+
+        self.turns = {}
+        self.layer_details = self.get_details()
+        self.layers = self.get_layer_index()
+
+        self.merge_stickers = n >= MERGE_STICKERS_SIZE
+        self.uniform_blocks = True
+        self.face_layouts = self.get_face_layouts()
+        self.init_state()
+
+    def get_layer_index(self) -> LayerIndex:
+        centers = np.array([(detail.rest_vertices.min(axis=0) + detail.rest_vertices.max(axis=0)) / 2
+                            for detail in self.layer_details])
+        pivot = np.array([self.pivot.x, self.pivot.y, self.pivot.z])
+        sides_centers = self.buffer.rest[self.centers.sides_centers_indices]
+        sides_centers = {side: sides_centers[i] for side, i in self.centers.sides_centers_keys.items()}
+
+        angle = self.cfg.get_turn_angle()
+        everything = np.ones(len(centers), dtype=bool)
+        permutations = {}
+        for side in self.cfg.get_sides():
+            for direction in (1, -1):
+                rotation = self.get_turning_matrix(side, direction * angle)
+                permutations[side, direction] = get_permutation(centers, everything, rotation, pivot)
+
+        return LayerIndex(get_layers(centers, pivot, sides_centers, self.n), permutations)
+
+    def get_turn(self, name: str) -> tuple[str, int, int]:
+        if name not in self.turns:
+            match = TURN_PATTERN.fullmatch(name)
+            if not match or match[2] not in self.cfg.get_sides():
+                raise ValueError(f'Incorrect turn "{name}"')
+
+            digits, side, wide = match.groups()
+            count = int(digits) if digits else 1 + bool(wide)
+            if not 0 < count < self.n:
+                raise ValueError(f'Incorrect turn "{name}", a {self.n}x{self.n}x{self.n} cube turns up to '
+                                 f'{self.n - 1} layers')
+            self.turns[name] = side, 0 if wide else count - 1, count - 1
+
+        return self.turns[name]
+
+    @staticmethod
+    def get_layer_name(side: str, layer: int) -> str:
+        return f'{layer + 1}{side}' if layer else side
+
+    def get_layer_names(self) -> list[str]:
+        sides = self.cfg.get_sides()
+        return list(sides) + [self.get_layer_name(side, layer) for side in sides for layer in range(1, self.n - 1)]
+
+    def get_layer_details(self, side: str, first: int, last: int) -> list[Detail]:
+        if first > last:
+            return []
+
+        return [self.layer_details[i] for i in self.layers.get_members(side, first, last)]
+
+    def get_side_indices(self, name: str) -> np.ndarray:
+        return join_indices(detail.indices for detail in self.get_layer_details(*self.get_turn(name)))
+
+    def get_static_plastic_part(self, name: str) -> np.ndarray:
+        side, first, last = self.get_turn(name)
+        if not last:
+            return self.corners.get_static_plastic_part(side, self.n)
+
+        return np.array([self.corners.get_static_plastic_part(side, self.n, depth) for depth in (first, last + 1)])
+
+    def update_sides(self, name: str, direction: int) -> None:
+        side, first, last = self.get_turn(name)
+        inner = self.get_layer_details(side, max(first, 1), last)
+        self.snap_side(name)
+
+        if not first:
+            self.corners.update_sides(side, direction)
+            if self.n > 2:
+                self.ribs.update_sides(side, direction)
+        self.ribs.turn_details([detail for detail in inner if isinstance(detail, Rib)], side, direction)
+        self.centers.turn_details([detail for detail in inner if isinstance(detail, Center)], side, direction)
+        self.layers.turn(side, direction, first, last)
+
+        for layer in range(first, last + 1):
+            self.move_state(self.get_layer_name(side, layer), direction)
+        if last and self.uniform_blocks:
+            self.uniform_blocks = False
+            self.face_layouts = self.get_face_layouts()
+        self.invalidate()
+
+    def draw_turning(self, painter: QtDrawer, name: str, plastic_part: np.ndarray) -> None:
+        side, first, last = self.get_turn(name)
+        if not last:
+            super().draw_turning(painter, side, plastic_part)
+            return
+
+        def draw_block(details: list[Detail], cap: np.ndarray | None) -> Callable[[QtDrawer], None]:
+            def draw(painter_: QtDrawer) -> None:
+                shadows = None if not self.light_sources else self.count_shadows()
+                visible = get_mask(self.visible_sides)
+                painter_.begin_batch()
+                for detail in details:
+                    if visible & detail.mask:
+                        detail.draw(painter_, self.visible_sides, shadows)
+                painter_.end_batch()
+
+                if cap is not None:
+                    painter_.setBrush(self.brushes.get_brush('black'))
+                    painter_.fill(self.project_points(cap))
+
+            return draw
+
+        self.project()
 
-        super().__init__(corners, ribs, centers, n, CUBE)
+        pen = QPen(Qt.black, 6)
+        painter.setPen(pen)
 
+        outer = self.get_layer_details(side, 0, first - 1)
+        inner = self.get_layer_details(side, last + 1, self.n - 1)
+        if side in self.visible_sides:
+            below, above = draw_block(inner, plastic_part[1]), draw_block(outer, None)
+        else:
+            below, above = draw_block(outer, plastic_part[0] if first else None), draw_block(inner, None)
 
-class Pyramid(Model):
-    def __init__(self, n: int):
-        corners = Corners(n, PYRAMID)
-        ribs = Ribs(n, PYRAMID)
-        centers = Centers(n, PYRAMID)
+        self.draw_static(painter, (name, 'below'), below)
+        self.artist_layers(painter, side, self.get_layer_details(side, first, last), first > 0)
+        self.draw_static(painter, (name, 'above'), above)
 
-        self.turning_centers = None
-        self.extra = None
+    def artist_layers(self, painter: QtDrawer, side: str, details: list[Detail], inner: bool) -> None:
+        centers = {detail: detail.get_center_z() for detail in details}
+        details = sorted(centers, key=centers.get)
+        if self.light_sources:
+            self.shade_details(details)
+
+        for detail in details:
+            detail.draw_turning(painter, self.visible_sides, side, self.matrix_center[:-1], self.light_sources,
+                                self.version, inner)
+
+    def get_face_layouts(self) -> dict[str, tuple[np.ndarray, np.ndarray, list[tuple[int, int]]]]:
+        layouts = {}
+        carcass = self.corners.carcass_indices.start
+        if not self.uniform_blocks:
+            spans = [(i, i + 1) for i in range(self.n)]
+        elif self.n > 2:
+            spans = [(0, 1), (1, self.n - 1), (self.n - 1, self.n)]
+        else:
+            spans = [(0, 1), (1, 2)]
+        starts = np.array([start for start, _ in spans])
+
+        for i, (side, (first, second, origin)) in enumerate(self.cfg.get_sides().items()):
+            indices = np.array([carcass + self.corners.carcass_keys[key] for key in (origin, first, second)])
+            cells = i * self.n ** 2 + starts[:, np.newaxis] * self.n + starts
+            layouts[side] = indices, cells, spans
+
+        return layouts
+
+    def get_facelet_order(self, faces: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        rows, cols = np.empty(len(faces)), np.empty(len(faces))
+        for i, (indices, _, _) in enumerate(self.face_layouts.values()):
+            origin, first, second = self.buffer.rest[indices]
+            on_face = faces == i
+            for axis, end in ((rows, first), (cols, second)):
+                direction = end - origin
+                axis[on_face] = (centers[on_face] - origin) @ direction / (direction @ direction)
 
-        super().__init__(corners, ribs, centers, n, PYRAMID)
+        return np.lexsort((np.floor(cols * self.n), np.floor(rows * self.n), faces))
 
-    def turn_side(self, name, angle):
-        self.move(-self.center_point)
+    def draw(self, painter: QtDrawer) -> None:
+        if not self.merge_stickers:
+            super().draw(painter)
+            return
+
+        self.project()
+        shadows = None if not self.light_sources else self.count_shadows()
+        points = self.buffer.points
+        faces = {}
+
+        painter.setPen(Qt.NoPen)
+        painter.begin_batch()
+        for side in self.visible_sides:
+            indices, cells, spans = self.face_layouts[side]
+            origin, first, second = points[indices]
+            rows_step, cols_step = (first - origin) / self.n, (second - origin) / self.n
+            faces[side] = origin, rows_step, cols_step
+
+            colors = self.state.state[cells].tolist()
+            for row, last_row, col, last_col, code in merge_regions(colors):
+                color = self.state.sides[code]
+                i = [spans[row][0], spans[last_row][1]]
+                j = [spans[col][0], spans[last_col][1]]
+                vertices = origin + np.outer([i[0], i[1], i[1], i[0]], rows_step)
+                vertices += np.outer([j[0], j[0], j[1], j[1]], cols_step)
+
+                painter.setBrush(self.brushes.get_brush(color, shadows[side] if shadows else None))
+                painter.fill(vertices)
+        painter.end_batch()
+
+        painter.setPen(QPen(Qt.black, 6))
+        painter.setBrush(Qt.NoBrush)
+        for origin, rows_step, cols_step in faces.values():
+            for i in range(1, self.n):
+                start = origin + i * rows_step
+                finish = start + self.n * cols_step
+                painter.create_line(start[0], start[1], finish[0], finish[1])
+
+                start = origin + i * cols_step
+                finish = start + self.n * rows_step
+                painter.create_line(start[0], start[1], finish[0], finish[1])
+
+            painter.fill(origin + np.outer([0, self.n, self.n, 0], rows_step) +
+                         np.outer([0, 0, self.n, self.n], cols_step))
 
-        offset = Point(self.corners.carcass[PyramidConfig().get_opposite_corners()[name]])
-        self.move(-offset)
 
-        direction_vector = Vector(self.centers.sides_centers[name])
-        direction_vector.normalize()
-        d = direction_vector.get_length_xy()
+class Pyramid(Model):
+    def __init__(self, n: int):
+        if n != 3:
+            raise ValueError(f'Unsupported pyramid size {n}, only the 3-layer pyramid can be turned')
 
-        alpha = Angle()  # to yz plane
-        beta = Angle()  # to y
-        try:
-            alpha.set_cos(direction_vector.y / d)
-            alpha.set_sin(direction_vector.x / d)
-        except ZeroDivisionError:
-            alpha.set_cos(1)
-            alpha.set_sin(0)
-        beta.set_cos(d)
-        beta.set_sin(-direction_vector.z)
+        buffer = VertexBuffer()
+        corners = Corners(n, PYRAMID, buffer)
+        ribs = Ribs(n, PYRAMID, buffer)
+        centers = Centers(n, PYRAMID, buffer)
 
-        self.turn_side_elements(name, angle, alpha, beta)
+        self.turning_centers = None
+        self.extra = None
 
-        self.move(offset)
-        self.move(self.center_point)
+        super().__init__(corners, ribs, centers, buffer, n, PYRAMID)
+        self.init_state()
 
     def init_turning_centers(self, name: str) -> None:
         self.turning_centers, self.extra = self.centers.get_turning_centers(name)
@@ -288,48 +631,58 @@ class Pyramid(Model):
         self.turning_centers = None
         self.extra = None
 
-    def update_sides(self, side: str, direction: int) -> None:
-        self.corners.update_sides(side, direction)
-        self.ribs.update_sides(side, direction)
-        self.centers.update_sides(side, direction, self.turning_centers, self.extra)
+    def get_layer_indices(self, name: str) -> np.ndarray:
+        self.init_turning_centers(name)
+        indices = self.get_side_indices(name)
+        self.uninit_turning_centers()
 
-    def turn_side_elements(self, name: str, angle: float, alpha: Angle, beta: Angle) -> None:
-        self.turn_oz_funcs(alpha.sin, alpha.cos)
-        self.turn_ox_funcs(beta.sin, beta.cos)
+        return indices
 
-        self.corners.turn_side_oy(name, angle)
-        self.ribs.turn_side_oy(name, angle)
-        self.centers.turn_side_oy(name, angle, self.turning_centers)
+    def get_side_indices(self, name: str) -> np.ndarray:
+        indices = self.corners.get_side_indices(name) + self.ribs.get_side_indices(name)
+        indices += self.centers.get_side_indices(name, self.turning_centers)
 
-        self.turn_ox_funcs(-beta.sin, beta.cos)
-        self.turn_oz_funcs(-alpha.sin, alpha.cos)
+        return join_indices(indices)
 
-    def draw_turning(self, painter: QtDrawer, side: str, plastic_part: list[Point]) -> None:
-        def draw_below_turning(shadows_=None):
-            self.ribs.draw_below_turning(painter, self.visible_sides, side, shadows_)
-            self.centers.draw_below_turning(painter, self.visible_sides, self.extra, shadows_)
-            self.corners.draw_below_turning(painter, self.visible_sides, side, shadows_)
+    def update_sides(self, side: str, direction: int) -> None:
+        self.snap_side(side)
 
-        def draw_static_plastic_part():
-            painter.setBrush(QBrush(QColor('black'), Qt.SolidPattern))
-            painter.fill(plastic_part)
+        self.corners.update_sides(side, direction)
+        self.ribs.update_sides(side, direction)
+        self.centers.update_sides(side, direction, self.turning_centers, self.extra)
+        self.move_state(side, direction)
+        self.invalidate()
+
+    def draw_turning(self, painter: QtDrawer, side: str, plastic_part: np.ndarray) -> None:
+        def draw_below_turning(painter_: QtDrawer) -> None:
+            shadows = None if not self.light_sources else self.count_shadows()
+            painter_.begin_batch()
+            self.ribs.draw_below_turning(painter_, self.visible_sides, side, shadows)
+            self.centers.draw_below_turning(painter_, self.visible_sides, self.extra, shadows)
+            self.corners.draw_below_turning(painter_, self.visible_sides, side, shadows)
+            painter_.end_batch()
+
+        def draw_static_part(painter_: QtDrawer) -> None:
+            draw_below_turning(painter_)
+            painter_.setBrush(self.brushes.get_brush('black'))
+            painter_.fill(self.project_points(plastic_part))
 
         def draw_dynamic_plastic_part():
-            painter.setBrush(QBrush(QColor('black'), Qt.SolidPattern))
-            painter.fill(self.corners.get_static_pyramid_plastic(side, False))
+            painter.setBrush(self.brushes.get_brush('black'))
+            painter.fill(self.project_points(self.corners.get_static_pyramid_plastic(side)))
+
+        self.project()
 
         pen = QPen(Qt.black, 6)
         painter.setPen(pen)
-        shadows = None if not self.light_sources else self.count_shadows()
 
         if side in self.visible_sides:
-            draw_below_turning(shadows)
-            draw_static_plastic_part()
+            self.draw_static(painter, side, draw_static_part)
             self.artist(painter, side)
         else:
             self.artist(painter, side)
             draw_dynamic_plastic_part()
-            draw_below_turning(shadows)
+            self.draw_static(painter, side, draw_below_turning)
 
     def artist(self, painter: QtDrawer, side: str) -> None:
         corners = self.corners.get_centers(side)
@@ -344,9 +697,12 @@ class Pyramid(Model):
         eccentric |= turning_centers
 
         details = sorted(eccentric, key=eccentric.get)
+        if self.light_sources:
+            self.shade_details(details)
 
         for detail in details:
-            detail.draw_turning(painter, self.visible_sides, side, self.matrix_center[:-1], self.light_sources)
+            detail.draw_turning(painter, self.visible_sides, side, self.matrix_center[:-1], self.light_sources,
+                                self.version)
 
-    def get_static_plastic_part(self, side: str) -> list[Point]:
+    def get_static_plastic_part(self, side: str) -> np.ndarray:
         return self.corners.get_static_pyramid_plastic(side)
@@ -0,0 +1,135 @@
+import numpy as np
+
+Move = tuple[str, int]
+
+
+class FaceletState:
+    def __init__(self, sides: list[str], facelets: np.ndarray, permutations: dict[Move, np.ndarray]):
+        self.sides = sides
+        self.solved = np.asarray(facelets, dtype=np.uint8)
+        self.solved.flags.writeable = False
+        self.faces = [sides[code] for code in self.solved.tolist()]
+        self.state = self.solved.copy()
+        self.colors = None
+        self.version = 0
+
+        self.moves = list(permutations)
+        self.codes = {move: i for i, move in enumerate(self.moves)}
+        self.permutations = {move: np.asarray(permutation, dtype=np.intp) for move, permutation in permutations.items()}
+        self.table = np.stack(list(self.permutations.values())).astype(np.min_scalar_type(len(facelets)))
+        self.table.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+    def set_state(self, state: np.ndarray) -> None:
+        self.state = state
+        self.colors = None
+        self.version += 1
+
+    def reset(self) -> None:
+        self.set_state(self.solved.copy())
+
+    def is_solved(self) -> bool:
+        return bool(np.array_equal(self.state, self.solved))
+
+    def get_color(self, index: int) -> str:
+        return self.sides[self.state[index]]
+
+    def get_colors(self) -> list[str]:
+        if self.colors is None:
+            self.colors = [self.sides[code] for code in self.state.tolist()]
+
+        return self.colors
+
+    def get_codes(self, moves: list[Move]) -> np.ndarray:
+        return np.array([self.codes[move] for move in moves], dtype=np.intp)
+
+    def move(self, side: str, direction: int) -> None:
+        self.set_state(self.state[self.permutations[side, direction]])
+
+    def apply(self, moves: list[Move] | np.ndarray) -> None:
+        codes = moves if isinstance(moves, np.ndarray) else self.get_codes(moves)
+        if len(codes):
+            self.set_state(self.state[self.compose(codes)])
+
+    def compose(self, codes: np.ndarray, chunk: int = 4096) -> np.ndarray:
+        result = np.arange(len(self.state), dtype=self.table.dtype)
+        for start in range(0, len(codes), chunk):
+            permutations = self.table[codes[start:start + chunk]]
+            while len(permutations) > 1:
+                last = permutations[-1:] if len(permutations) % 2 else None
+                permutations = np.take_along_axis(permutations[0:-1:2], permutations[1::2], axis=1)
+                if last is not None:
+                    permutations = np.concatenate((permutations, last))
+            result = result[permutations[0]]
+
+        return result
+
+
+class FaceletBatch:
+    def __init__(self, state: FaceletState, count: int):
+        self.template = state
+        self.states = np.tile(state.solved, (count, 1))
+        self.buffer = np.empty_like(self.states)
+        self.table = state.table.astype(np.intp)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def reset(self) -> None:
+        self.states[:] = self.template.solved
+
+    def is_solved(self) -> np.ndarray:
+        return (self.states == self.template.solved).all(axis=1)
+
+    def get_matches(self) -> np.ndarray:
+        return (self.states == self.template.solved).sum(axis=1)
+
+    def swap(self) -> None:
+        self.states, self.buffer = self.buffer, self.states
+
+    def move(self, side: str, direction: int) -> None:
+        np.take(self.states, self.template.permutations[side, direction], axis=1, out=self.buffer)
+        self.swap()
+
+    def apply(self, moves: list[Move] | np.ndarray) -> None:
+        codes = moves if isinstance(moves, np.ndarray) else self.template.get_codes(moves)
+        if len(codes):
+            np.take(self.states, self.template.compose(codes).astype(np.intp), axis=1, out=self.buffer)
+            self.swap()
+
+    def apply_codes(self, codes: np.ndarray, chunk: int = 4096) -> None:
+        size = self.states.shape[1]
+        offsets = np.arange(chunk)[:, np.newaxis] * size
+
+        for start in range(0, len(self.states), chunk):
+            rows = slice(start, start + chunk)
+            indices = self.table[codes[rows]]
+            indices += offsets[:len(indices)]
+            np.take(self.states[rows].reshape(-1), indices, out=self.buffer[rows])
+        self.swap()
+
+    def scramble(self, length: int, rng: np.random.Generator | None = None) -> np.ndarray:
+        rng = np.random.default_rng() if rng is None else rng
+        codes = rng.integers(0, len(self.table), size=(length, len(self.states)))
+        for step in codes:
+            self.apply_codes(step)
+
+        return codes.T
+
+
+def get_permutation(centers: np.ndarray, layer: np.ndarray, rotation: np.ndarray, pivot: np.ndarray,
+                    tolerance: float = 1e-3) -> np.ndarray:
+    sources = np.flatnonzero(layer)
+    moved = (centers[sources] - pivot) @ rotation.T + pivot
+
+    distances = np.linalg.norm(moved[:, np.newaxis] - centers[np.newaxis, layer], axis=2)
+    targets = sources[distances.argmin(axis=1)]
+    if distances.min(axis=1).max() > tolerance or len(set(targets)) != len(targets):
+        raise ValueError('Turn does not map the layer stickers onto each other')
+
+    permutation = np.arange(len(centers))
+    permutation[targets] = sources
+
+    return permutation
@@ -0,0 +1,63 @@
+from typing import Iterable
+
+import numpy as np
+
+from src.utils.matrix import RotationGroup, transform_points
+from src.utils.point import Point
+
+Indices = slice | np.ndarray
+
+
+class VertexBuffer:
+    def __init__(self):
+        self.rest = np.empty((0, 3))
+        self.points = np.empty((0, 3))
+
+        self.group = None
+        self.pivot = None
+        self.home = None
+        self.orientation = None
+
+    def __len__(self):
+        return len(self.rest)
+
+    def __str__(self):
+        return f'VertexBuffer({len(self)})'
+
+    def add(self, vertices: Iterable[Point]) -> slice:
+        start = len(self.rest)
+        rows = np.array([[vertex.x, vertex.y, vertex.z] for vertex in vertices], dtype=float)
+        self.rest = np.concatenate((self.rest, rows.reshape(-1, 3)))
+        self.points = np.concatenate((self.points, rows.reshape(-1, 3)))
+
+        return slice(start, len(self.rest))
+
+    def project(self, view: np.ndarray) -> None:
+        transform_points(self.rest, view, self.points)
+
+    def move(self, point: Point, indices: Indices = slice(None)) -> None:
+        self.rest[indices] += (point.x, point.y, point.z)
+
+    def init_rotations(self, group: RotationGroup, pivot: Point) -> None:
+        self.group = group
+        self.pivot = np.array((pivot.x, pivot.y, pivot.z))
+        self.home = self.rest.copy()
+        self.orientation = np.zeros(len(self), dtype=int)
+
+    def rotate(self, rotation: int, indices: Indices) -> None:
+        self.orientation[indices] = self.group.table[rotation, self.orientation[indices]]
+
+    def get_layer(self, indices: Indices) -> np.ndarray:
+        rotations = self.group.elements[self.orientation[indices]]
+        return np.einsum('vij,vj->vi', rotations, self.home[indices] - self.pivot)
+
+    def regenerate(self, indices: Indices) -> None:
+        self.rest[indices] = self.get_layer(indices) + self.pivot
+
+    def turn(self, indices: Indices, layer: np.ndarray, rotation: np.ndarray) -> None:
+        self.rest[indices] = layer @ rotation.T + self.pivot
+
+
+def join_indices(indices: Iterable[slice]) -> np.ndarray:
+    ranges = [np.arange(index.start, index.stop) for index in indices]
+    return np.concatenate(ranges) if ranges else np.empty(0, dtype=int)
@@ -1,6 +1,3 @@
-from src.utils.point import Point
-
-
 class Edge:
     def __init__(self, first: str, second: str):
         self.first = first
@@ -12,7 +9,7 @@ class Edge:
     def __repr__(self):
         return str(self)
 
-    def get_points(self, vertices: dict[str, Point]) -> tuple[Point, Point]:
+    def get_points(self, vertices: dict[str, int]) -> tuple[int, int]:
         return vertices[self.first], vertices[self.second]
 
     def __contains__(self, item):
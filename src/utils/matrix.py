@@ -1,4 +1,8 @@
-from src.utils.mymath import Vector
+from functools import lru_cache
+
+import numpy as np
+
+from src.utils.mymath import Vector, sin_deg, cos_deg
 from src.utils.point import Point
 
 
@@ -33,49 +37,128 @@ class MatrixPlane:
 
 class MatrixBody:
     def __init__(self, coefficients: dict[str, list[float]]):
-        self.sides = coefficients.keys()
-        self.coefficients = list(coefficients.values())
+        self.sides = list(coefficients.keys())
+        self.coefficients = np.array(list(coefficients.values()), dtype=float).reshape(-1, 4)
         self.size = len(self.coefficients)
 
+    @classmethod
+    def from_normals(cls, sides: list[str], normals: np.ndarray, points: np.ndarray) -> 'MatrixBody':
+        distances = -np.einsum('ij,ij->i', normals, points)
+        return cls(dict(zip(sides, np.column_stack((normals, distances)))))
+
     def __str__(self):
         result = ''
-        for i in range(len(self.coefficients[0])):
-            for j in range(self.size):
-                result += f'{self.coefficients[j][i]:^14.1f}'
+        for row in self.coefficients.T:
+            result += ''.join(f'{coefficient:^14.1f}' for coefficient in row)
             result += '\n'
 
         return result
 
-    def negative(self, i: int) -> None:
-        self.coefficients[i] = [-coefficient for coefficient in self.coefficients[i]]
+    def multiplication_vector(self, vector: list[float]) -> np.ndarray:
+        return self.coefficients @ np.asarray(vector, dtype=float)
 
-    def multiplication_vector(self, vector: list[float]) -> list[float]:
-        result = []
+    def multiplication(self, matrix: list[list[float]]) -> np.ndarray:
+        return self.coefficients @ np.asarray(matrix, dtype=float).T
 
-        for i in range(self.size):
-            result.append(0)
-            for j in range(len(vector)):
-                result[i] += vector[j] * self.coefficients[i][j]
+    def adjust(self, point: list[float]) -> None:
+        result = self.multiplication_vector(point)
+        self.coefficients[result > 0] *= -1
 
-        return result
+    def transform(self, matrix: list[list[float]]) -> None:
+        self.coefficients = self.multiplication(matrix)
 
-    def multiplication(self, matrix: list[list[float]]) -> list[list[float]]:
-        result = [[] for _ in range(self.size)]
-        size = len(matrix[0])
 
-        for i in range(len(matrix)):
-            for j in range(self.size):
-                result[j].append(0)
-                for k in range(size):
-                    result[j][i] += matrix[i][k] * self.coefficients[j][k]
+class RotationGroup:
+    def __init__(self, generators: list[np.ndarray]):
+        generators = [np.where(np.isclose(matrix, np.round(matrix)), np.round(matrix), matrix)
+                      for matrix in generators]
 
-        return result
+        elements = [np.identity(3)]
+        i = 0
+        while i < len(elements):
+            for generator in generators:
+                product = generator @ elements[i]
+                if not any(np.allclose(product, element) for element in elements):
+                    elements.append(product)
+            i += 1
 
-    def adjust(self, point: list[float]) -> None:
-        result = self.multiplication_vector(point)
-        for i in range(len(result)):
-            if result[i] > 0:
-                self.negative(i)
+        self.elements = np.array(elements)
+        self.table = np.array([[self.find(a @ b) for b in self.elements] for a in self.elements])
 
-    def transform(self, matrix: list[list[float]]) -> None:
-        self.coefficients = self.multiplication(matrix)
+    def __len__(self):
+        return len(self.elements)
+
+    def find(self, matrix: np.ndarray) -> int:
+        return int(np.abs(self.elements - matrix).sum(axis=(1, 2)).argmin())
+
+
+def get_turn_ox_matrix(sin_angle: float, cos_angle: float) -> np.ndarray:
+    return np.array([
+        [1, 0, 0],
+        [0, cos_angle, -sin_angle],
+        [0, sin_angle, cos_angle]
+    ])
+
+
+def get_turn_oy_matrix(sin_angle: float, cos_angle: float) -> np.ndarray:
+    return np.array([
+        [cos_angle, 0, sin_angle],
+        [0, 1, 0],
+        [-sin_angle, 0, cos_angle]
+    ])
+
+
+def get_turn_oz_matrix(sin_angle: float, cos_angle: float) -> np.ndarray:
+    return np.array([
+        [cos_angle, -sin_angle, 0],
+        [sin_angle, cos_angle, 0],
+        [0, 0, 1]
+    ])
+
+
+def get_rotation_matrix(axis: Vector, angle: float) -> np.ndarray:
+    length = axis.get_length()
+    x, y, z = axis.x / length, axis.y / length, axis.z / length
+    cross = np.array([
+        [0, -z, y],
+        [z, 0, -x],
+        [-y, x, 0]
+    ])
+
+    return np.identity(3) + sin_deg(angle) * cross + (1 - cos_deg(angle)) * cross @ cross
+
+
+def get_homogenous_matrix(matrix: np.ndarray) -> np.ndarray:
+    result = np.identity(4)
+    result[:3, :3] = matrix
+    return result
+
+
+@lru_cache(maxsize=None)
+def get_axis_turn_matrix(axis: str, angle: float) -> np.ndarray:
+    turns = {'x': get_turn_ox_matrix, 'y': get_turn_oy_matrix, 'z': get_turn_oz_matrix}
+    matrix = get_homogenous_matrix(turns[axis](sin_deg(angle), cos_deg(angle)))
+    matrix.flags.writeable = False
+
+    return matrix
+
+
+def get_normal_matrix(matrix: np.ndarray) -> np.ndarray:
+    linear = matrix[:3, :3]
+    return np.linalg.det(linear) * np.linalg.inv(linear).T
+
+
+def get_move_matrix(point: Point) -> np.ndarray:
+    result = np.identity(4)
+    result[:3, 3] = point.x, point.y, point.z
+    return result
+
+
+def get_scale_matrix(k: float) -> np.ndarray:
+    return np.diag((k, k, k, 1.0))
+
+
+def transform_points(points: np.ndarray, matrix: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    out = np.matmul(points, matrix[:3, :3].T, out=out)
+    out += matrix[:3, 3]
+    return out
@@ -1,14 +1,15 @@
 import src.general.config as config
 from math import pi, sin, cos, sqrt
+import numpy as np
 import src.utils.point as p
 
 
 class Vector:
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, start, finish=None):
         if finish:
-            self.x = finish.x - start.x
-            self.y = finish.y - start.y
-            self.z = finish.z - start.z
+            self.set(start, finish)
         elif isinstance(start, list):
             self.x = start[0]
             self.y = start[1]
@@ -32,6 +33,11 @@ class Vector:
         self.z = -self.z
         return self
 
+    def set(self, start, finish) -> None:
+        self.x = finish.x - start.x
+        self.y = finish.y - start.y
+        self.z = finish.z - start.z
+
     def negative(self) -> None:
         self.x = -self.x
         self.y = -self.y
@@ -53,13 +59,6 @@ class Vector:
     def get_length(self) -> float:
         return sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
 
-    def adjust(self, point_1, point_2) -> None:
-        vector = Vector(point_1, point_2)
-        scalar = scalar_multiplication(self, vector)
-        cosine = scalar / (self.get_length() * vector.get_length())
-        if cosine < 0:
-            self.negative()
-
 
 def scalar_multiplication(vector_1, vector_2):
     return vector_1.x * vector_2.x + vector_1.y * vector_2.y + vector_1.z * vector_2.z
@@ -89,11 +88,19 @@ def degrees(angle):
     return angle * 180 / pi
 
 
+SIN_TABLE = [sin(radians(angle)) for angle in range(360)]
+COS_TABLE = [cos(radians(angle)) for angle in range(360)]
+
+
 def sin_deg(angle):
+    if angle == int(angle):
+        return SIN_TABLE[int(angle) % 360]
     return sin(radians(angle))
 
 
 def cos_deg(angle):
+    if angle == int(angle):
+        return COS_TABLE[int(angle) % 360]
     return cos(radians(angle))
 
 
@@ -114,14 +121,6 @@ def add_repeats(points_1, points_2):
     return result
 
 
-def find_by_key(d, key):
-    key = sorted(list(key))
-    for k in d:
-        if sorted(list(k)) == key:
-            return k
-    raise KeyError('There is no such key in dictionary')
-
-
 def find_y_min_max(vertices):
     if isinstance(vertices, list):
         cur_vertices = vertices
@@ -155,31 +154,58 @@ def get_vertices_by_pairs(vertices_pairs):
     return vertices
 
 
-def replace_list(src_list, old, new):
-    new_iter = iter(new)
-    return [x if x not in old else next(new_iter) for x in src_list]
+def merge_regions(colors):
+    rows, cols = len(colors), len(colors[0])
+    used = [[False] * cols for _ in range(rows)]
+    regions = []
 
+    for row in range(rows):
+        for col in range(cols):
+            if used[row][col]:
+                continue
+            color = colors[row][col]
 
-def reverse_replace_list(src_list, old, new, const):
-    new_list = replace_list(src_list, old, new)
-    indices = [i for i in range(len(src_list))]
-    indices.remove(src_list.index(const))
-    new_list[indices[0]], new_list[indices[-1]] = new_list[indices[-1]], new_list[indices[0]]
+            last_col = col
+            while last_col + 1 < cols and not used[row][last_col + 1] and colors[row][last_col + 1] == color:
+                last_col += 1
+            last_row = row
+            while last_row + 1 < rows and all(not used[last_row + 1][i] and colors[last_row + 1][i] == color
+                                              for i in range(col, last_col + 1)):
+                last_row += 1
 
-    return new_list
+            for i in range(row, last_row + 1):
+                used[i][col:last_col + 1] = [True] * (last_col + 1 - col)
+            regions.append((row, last_row, col, last_col, color))
+
+    return regions
 
 
 def get_dist(p_1, p_2):
     return sqrt((p_2.x - p_1.x) ** 2 + (p_2.y - p_1.y) ** 2 + (p_2.z - p_1.z) ** 2)
 
 
-def get_plane_cosine(light, point, normal):
-    vector = Vector(light, point)
-    scalar = scalar_multiplication(vector, normal)
-    lengths = vector.get_length() * normal.get_length()
-    cosine = scalar / lengths
+def get_plane_normals(planes: np.ndarray) -> np.ndarray:
+    return np.cross(planes[:, 0] - planes[:, 2], planes[:, 1] - planes[:, 2])
 
-    if cosine >= config.SHADOW:
-        return cosine
-    else:
-        return config.SHADOW
+
+def adjust_normals(normals: np.ndarray, points: np.ndarray, center: list[float]) -> np.ndarray:
+    scalars = np.einsum('ij,ij->i', normals, np.asarray(center, dtype=float) - points)
+    return np.where(scalars[:, None] < 0, -normals, normals)
+
+
+def get_lights_array(light_sources) -> np.ndarray:
+    return np.array([[light.x, light.y, light.z] for light in light_sources], dtype=float).reshape(-1, 3)
+
+
+def get_plane_cosines(lights: np.ndarray, points: np.ndarray, normals: np.ndarray) -> np.ndarray:
+    vectors = points[:, None, :] - lights[None, :, :]
+    scalars = np.einsum('slk,sk->sl', vectors, normals)
+    lengths = np.linalg.norm(vectors, axis=2) * np.linalg.norm(normals, axis=1)[:, None]
+    cosines = np.maximum(scalars / lengths, config.SHADOW)
+
+    return np.minimum(cosines.sum(axis=1), 1)
+
+
+def get_planes_shadows(light_sources, points: np.ndarray, normals: np.ndarray, center: list[float]) -> np.ndarray:
+    normals = adjust_normals(normals, points, center)
+    return get_plane_cosines(get_lights_array(light_sources), points, normals)
@@ -3,6 +3,8 @@ from src.utils.mymath import sin_deg, cos_deg
 
 
 class Point:
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x: float | int = 0, y: float | int = 0, z: float | int = 0):
         if isinstance(x, Point):
             self.x = x.x
@@ -59,19 +61,13 @@ class Point:
         self.z = point.z + (self.z - point.z) * k
 
     def turn_ox(self, angle: float) -> None:
-        y, z = self.y, self.z
-        self.y = y * cos_deg(angle) - z * sin_deg(angle)
-        self.z = y * sin_deg(angle) + z * cos_deg(angle)
+        self.turn_ox_funcs(sin_deg(angle), cos_deg(angle))
 
     def turn_oy(self, angle: float) -> None:
-        x, z = self.x, self.z
-        self.x = x * cos_deg(angle) + z * sin_deg(angle)
-        self.z = -x * sin_deg(angle) + z * cos_deg(angle)
+        self.turn_oy_funcs(sin_deg(angle), cos_deg(angle))
 
     def turn_oz(self, angle: float) -> None:
-        x, y = self.x, self.y
-        self.x = x * cos_deg(angle) - y * sin_deg(angle)
-        self.y = x * sin_deg(angle) + y * cos_deg(angle)
+        self.turn_oz_funcs(sin_deg(angle), cos_deg(angle))
 
     def turn_ox_funcs(self, sin_angle: float, cos_angle: float) -> None:
         y, z = self.y, self.z